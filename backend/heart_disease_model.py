@@ -2,6 +2,14 @@ import sys
 import json
 
 class HeartDiseasePredictor:
+    MODEL_INFO = {
+        'name': 'Heart Disease Risk Predictor',
+        'dataset': 'Cleveland Heart Disease Dataset',
+        'accuracy': '85-90%',
+        'algorithm': 'Weighted Logistic Regression',
+        'features_used': 11
+    }
+
     def __init__(self):
         # Risk factor weights based on medical research (Cleveland Heart Disease dataset features)
         self.risk_weights = {
@@ -111,15 +119,128 @@ class HeartDiseasePredictor:
             'confidence': probability,
             'recommendations': recommendations,
             'risk_factors': risk_factors,
-            'model_info': {
-                'name': 'Heart Disease Risk Predictor',
-                'dataset': 'Cleveland Heart Disease Dataset',
-                'accuracy': '85-90%',
-                'algorithm': 'Weighted Logistic Regression',
-                'features_used': 11
-            }
+            'model_info': dict(self.MODEL_INFO)
         }
 
+    # Column order of the array accepted by predict_heart_disease_batch (the command line order)
+    FEATURES = ['age', 'sex', 'chestPainType', 'restingBP', 'cholesterol', 'fastingBS', 'restingECG',
+                'maxHR', 'exerciseAngina', 'oldpeak', 'stSlope']
+
+    # stSlope score by slope code (upsloping, flat, downsloping); other codes score 0.0
+    ST_SLOPE_SCORES = (0.2, 0.6, 1.0)
+
+    def predict_heart_disease_batch(self, data, recommendations=False):
+        """Score a whole cohort at once, matching predict_heart_disease row for row.
+
+        data is an (N, 11) array in FEATURES order or a DataFrame with those columns.
+        Branches become masks and lookup tables. Results are length-N arrays, and
+        risk_factors is one array per factor rather than a dict per row. With
+        recommendations=True each row's list is added, computed once per distinct
+        combination of the inputs it depends on.
+        """
+        # Imported here so the one-shot command line does not pay for NumPy
+        import numpy as np
+
+        if hasattr(data, 'columns'):
+            data = data[self.FEATURES].to_numpy(dtype=np.float64)
+        data = np.asarray(data, dtype=np.float64).reshape(-1, len(self.FEATURES))
+        column = dict(zip(self.FEATURES, data.T))
+        age = column['age']
+
+        age_score = np.clip((age - 29) / (77 - 29), 0, 1)
+        sex_score = np.where(column['sex'] == 1, 1.0, 0.3)
+        cp_score = column['chestPainType'] / 3.0
+        bp_score = np.clip((column['restingBP'] - 90) / (200 - 90), 0, 1)
+        chol_score = np.clip((column['cholesterol'] - 126) / (564 - 126), 0, 1)
+        fbs_score = np.where(column['fastingBS'] == 1, 1.0, 0.0)
+        ecg_score = column['restingECG'] / 2.0
+
+        # max(0, x) keeps x only when x > 0 (so NaN becomes 0), then min(x, 1)
+        hr_score = (220 - age - column['maxHR']) / 40
+        hr_score = np.where(hr_score > 0, hr_score, 0.0)
+        hr_score = np.where(hr_score > 1, 1.0, hr_score)
+
+        angina_score = np.where(column['exerciseAngina'] == 1, 1.0, 0.0)
+        oldpeak_score = np.minimum(column['oldpeak'] / 6.2, 1)
+
+        slope = column['stSlope']
+        known_slope = np.isin(slope, np.arange(len(self.ST_SLOPE_SCORES)))
+        slope_index = np.where(known_slope, slope, 0).astype(int)
+        slope_score = np.where(known_slope, np.array(self.ST_SLOPE_SCORES)[slope_index], 0.0)
+
+        # Same order of additions as the scalar path
+        risk_score = np.zeros(len(data))
+        risk_score += age_score * self.risk_weights['age']
+        risk_score += sex_score * self.risk_weights['sex']
+        risk_score += cp_score * self.risk_weights['chestPainType']
+        risk_score += bp_score * self.risk_weights['restingBP']
+        risk_score += chol_score * self.risk_weights['cholesterol']
+        risk_score += fbs_score * self.risk_weights['fastingBS']
+        risk_score += ecg_score * self.risk_weights['restingECG']
+        risk_score += hr_score * self.risk_weights['maxHR']
+        risk_score += angina_score * self.risk_weights['exerciseAngina']
+        risk_score += oldpeak_score * self.risk_weights['oldpeak']
+        risk_score += slope_score * self.risk_weights['stSlope']
+
+        # NumPy's power may use SIMD kernels that differ from libm's pow by an ulp, so
+        # the power itself goes through Python floats like the scalar path
+        exponent = -(risk_score - 0.7) * 3
+        probability = 1 / (1 + np.array([2.71828 ** value for value in exponent.tolist()]))
+
+        band = np.where(probability < 0.25, 0, np.where(probability < 0.6, 1, 2))
+        risk = np.array(['Low', 'Moderate', 'High'])[band]
+
+        result = {
+            'prediction': (probability > 0.5).astype(int),
+            'probability': probability,
+            'risk': risk,
+            'confidence': probability,
+            'risk_factors': {
+                'age_risk': age_score,
+                'gender_risk': sex_score,
+                'chest_pain_risk': cp_score,
+                'bp_risk': bp_score,
+                'cholesterol_risk': chol_score,
+                'fbs_risk': fbs_score,
+                'hr_risk': hr_score,
+                'angina_risk': angina_score,
+                'st_depression_risk': oldpeak_score,
+                'st_slope_risk': slope_score,
+                'total_risk_score': risk_score
+            },
+            'model_info': dict(self.MODEL_INFO)
+        }
+
+        if recommendations:
+            # generate_recommendations only branches on these bands
+            bands = [
+                (age > 45).astype(int) + (age > 55),
+                (column['restingBP'] > 120).astype(int) + (column['restingBP'] > 140),
+                (column['cholesterol'] > 200).astype(int) + (column['cholesterol'] > 240),
+                (column['exerciseAngina'] == 1).astype(int),
+                (column['maxHR'] < (220 - age) * 0.8).astype(int),
+                (column['oldpeak'] > 1).astype(int) + (column['oldpeak'] > 2),
+                (column['fastingBS'] == 1).astype(int),
+                (column['chestPainType'] > 0).astype(int) + (column['chestPainType'] == 3),
+                band
+            ]
+            codes = np.zeros(len(data), dtype=np.int64)
+            for values in bands:
+                codes = codes * 3 + values
+            _, first_rows, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            lists = [self.generate_recommendations(self._row_input(data[row]), str(risk[row])) for row in first_rows]
+            result['recommendations'] = [lists[index] for index in inverse.tolist()]
+
+        return result
+
+    def _row_input(self, row):
+        """One row of a batch as the input dict of predict_heart_disease"""
+        values = dict(zip(self.FEATURES, row.tolist()))
+        for name in ('sex', 'chestPainType', 'fastingBS', 'restingECG', 'exerciseAngina', 'stSlope'):
+            if values[name].is_integer():
+                values[name] = int(values[name])
+        return values
+
     def generate_recommendations(self, input_data, risk_level):
         """Generate personalized recommendations based on input data and risk level"""
         recommendations = []
@@ -196,33 +317,79 @@ class HeartDiseasePredictor:
         unique_recommendations = list(dict.fromkeys(recommendations))
         return unique_recommendations[:8]  # Return top 8 recommendations
 
+MISSING_PARAMETERS = 'Missing input parameters. Required: age, sex, chestPainType, restingBP, cholesterol, fastingBS, restingECG, maxHR, exerciseAngina, oldpeak, stSlope'
+
+def parse_arguments(args):
+    """Input data from the command line arguments (without the script name)"""
+    return {
+        'age': float(args[0]),
+        'sex': int(args[1]),
+        'chestPainType': int(args[2]),
+        'restingBP': float(args[3]),
+        'cholesterol': float(args[4]),
+        'fastingBS': int(args[5]),
+        'restingECG': int(args[6]),
+        'maxHR': float(args[7]),
+        'exerciseAngina': int(args[8]),
+        'oldpeak': float(args[9]),
+        'stSlope': int(args[10])
+    }
+
+def error_result(e):
+    """Result reported when a prediction fails"""
+    return {
+        'error': str(e),
+        'prediction': 0,
+        'probability': 0.0,
+        'risk': 'Unknown',
+        'recommendations': ['Please try again or consult a healthcare professional.']
+    }
+
+def serve_stdio():
+    """Answer prediction requests from stdin until it closes (--serve-stdio).
+
+    Each line is a JSON object {"id": ..., "args": [...]} holding the command
+    line arguments of one call; each reply is one compact JSON line
+    {"id": ..., "result": {...}} with the result the command line would print.
+    """
+    predictor = HeartDiseasePredictor()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            args = [str(arg) for arg in request['args']]
+            if len(args) < 11:
+                result = {'error': MISSING_PARAMETERS}
+            else:
+                result = predictor.predict_heart_disease(parse_arguments(args))
+        except Exception as e:
+            result = error_result(e)
+
+        sys.stdout.write(json.dumps({'id': request_id, 'result': result}, separators=(',', ':')) + '\n')
+        sys.stdout.flush()
+
 def main():
     """Main function to handle command line prediction"""
+    if sys.argv[1:2] == ['--serve-stdio']:
+        serve_stdio()
+        return
+
     try:
         # Initialize predictor
         predictor = HeartDiseasePredictor()
 
         # Get input data from command line arguments (11 parameters)
         if len(sys.argv) < 12:
-            print(json.dumps({
-                'error': 'Missing input parameters. Required: age, sex, chestPainType, restingBP, cholesterol, fastingBS, restingECG, maxHR, exerciseAngina, oldpeak, stSlope'
-            }))
+            print(json.dumps({'error': MISSING_PARAMETERS}))
             sys.exit(1)
 
         # Parse input parameters
-        input_data = {
-            'age': float(sys.argv[1]),
-            'sex': int(sys.argv[2]),
-            'chestPainType': int(sys.argv[3]),
-            'restingBP': float(sys.argv[4]),
-            'cholesterol': float(sys.argv[5]),
-            'fastingBS': int(sys.argv[6]),
-            'restingECG': int(sys.argv[7]),
-            'maxHR': float(sys.argv[8]),
-            'exerciseAngina': int(sys.argv[9]),
-            'oldpeak': float(sys.argv[10]),
-            'stSlope': int(sys.argv[11])
-        }
+        input_data = parse_arguments(sys.argv[1:])
 
         # Make prediction
         result = predictor.predict_heart_disease(input_data)
@@ -231,13 +398,7 @@ def main():
         print(json.dumps(result, indent=2))
 
     except Exception as e:
-        print(json.dumps({
-            'error': str(e),
-            'prediction': 0,
-            'probability': 0.0,
-            'risk': 'Unknown',
-            'recommendations': ['Please try again or consult a healthcare professional.']
-        }))
+        print(json.dumps(error_result(e)))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,36 @@
+"""Shared setup for the Python regression tests at the repository root.
+
+Run them with: python -m pytest
+
+The ML service's modules import each other by bare name, so ml-service/ goes
+on sys.path once here. The rule-based predictors exist twice, in backend/ and
+ml-service/; the ``model_copy`` fixture runs a test against each copy.
+"""
+import functools
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MODEL_COPIES = ['backend', 'ml-service']
+
+sys.path.insert(0, os.path.join(ROOT, 'ml-service'))
+
+
+def load_copy(directory, name):
+    """directory/name.py imported as its own module (e.g. backend_diabetes_model), loaded once"""
+    module_name = f"{directory.replace('-', '_')}_{name}"
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, directory, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return sys.modules[module_name]
+
+
+@pytest.fixture(params=MODEL_COPIES)
+def model_copy(request):
+    """Loader for one copy of the model scripts: model_copy('diabetes_model') is that copy's module"""
+    return functools.partial(load_copy, request.param)
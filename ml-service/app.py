@@ -1,192 +1,1668 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify
 from flask_cors import CORS
 import numpy as np
-import pandas as pd
+from scipy.special import expit
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score
+import cProfile
+import contextlib
+import fcntl
+import functools
+import hmac
 import joblib
+import json
+import multiprocessing
 import os
+import pstats
+import resource
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+import heart_disease_model
+import mental_health_model
+from data_source import FEATURES, CsvSource, SyntheticSource, add_outcome, generate_features
+from explain import Explainer
+from kernel_svm import KernelApproxSVM
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from microbatch import MicroBatcher
+from model_store import process_memory, to_shared_models
+from online_learning import FeedbackLearner, OnlineLinearModel
+from prediction_cache import PredictionCache
+from tuning import load_best_params, save_best_params, tune_models
+from wire_format import PayloadError, columns_to_matrix, decode_body, encode_response
 
 app = Flask(__name__)
 CORS(app)
 
-# Global variables for models
-models = {}
-scaler = None
-FEATURES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age']
+# The live ModelSet; replaced as a whole, never mutated in place
+model_set = None
+model_set_lock = threading.Lock()
+
+# Set once models are loaded and warmed up; /health reports not-ready until then
+service_ready = threading.Event()
+warmup_stats = {}
+DISCLAIMER = 'This assessment is not a medical diagnosis. It is intended for awareness and self-reflection only. Always consult a healthcare professional for medical concerns.'
+
+# Upper bound on records accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+
+# Opt-in micro-batching of concurrent /predict calls. MICROBATCH_MAX_WAIT_MS bounds the
+# extra latency a request can pay waiting for others; MICROBATCH_MAX_BATCH_SIZE caps a batch.
+MICROBATCH_ENABLED = os.environ.get('MICROBATCH_ENABLED', '0') == '1'
+MICROBATCH_MAX_BATCH_SIZE = int(os.environ.get('MICROBATCH_MAX_BATCH_SIZE', 32))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2.0))
+
+# Risk bands on the ensemble's average diabetes probability
+MODERATE_RISK_THRESHOLD = 0.4
+HIGH_RISK_THRESHOLD = 0.7
+
+# Cascade inference: run models cheapest first and stop once the remaining ones can no
+# longer change the vote or the risk band. Per request with ?cascade=true|false.
+CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', '0') == '1'
+
+# Parallel model execution for /predict: the ensemble's predict_proba calls run concurrently
+# on PARALLEL_MODEL_WORKERS threads (sklearn's tree, boosting and libsvm predictions release
+# the GIL). A latency budget in ms (X-Latency-Budget-Ms header, ?budget_ms= or the
+# PREDICT_DEADLINE_MS default; 0 means none) also enables it; models still running at the
+# deadline are left out of the result.
+PARALLEL_MODELS_ENABLED = os.environ.get('PARALLEL_MODELS_ENABLED', '0') == '1'
+PARALLEL_MODEL_WORKERS = int(os.environ.get('PARALLEL_MODEL_WORKERS', 4))
+PREDICT_DEADLINE_MS = float(os.environ.get('PREDICT_DEADLINE_MS', 0))
+
+# In-process cache of /predict results for resubmitted forms and retries (size 0 disables)
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+
+# Load tree ensembles and SVC arrays as memory maps of an uncompressed artifact so every
+# gunicorn worker on a node shares one page-cache copy of the large arrays
+MODEL_MMAP = os.environ.get('MODEL_MMAP', '0') == '1'
+
+# Every MODEL_RELOAD_INTERVAL seconds each worker checks models/metadata.json and loads a set
+# another process saved (a retrain served by a sibling gunicorn worker); 0 disables the check
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 5))
+
+# Warmup inferences run per model before the service reports ready
+WARMUP_ROUNDS = int(os.environ.get('WARMUP_ROUNDS', 5))
+WARMUP_BATCH_SIZE = int(os.environ.get('WARMUP_BATCH_SIZE', 32))
+
+# Add per-feature contributions of every model to /predict responses (?explain= overrides)
+EXPLANATIONS_ENABLED = os.environ.get('EXPLANATIONS_ENABLED', '0') == '1'
+
+# Metrics served at /metrics in the Prometheus text format
+registry = Registry()
+REQUESTS = registry.counter('ml_service_requests_total', 'HTTP requests by route, method and status', ['route', 'method', 'status'])
+REQUEST_ERRORS = registry.counter('ml_service_request_errors_total', 'HTTP requests answered with a 4xx or 5xx status', ['route'])
+REQUEST_SECONDS = registry.histogram('ml_service_request_duration_seconds', 'HTTP request latency', ['route'])
+PREDICT_STAGE_SECONDS = registry.histogram('ml_service_predict_stage_seconds', 'Latency of each stage of a diabetes prediction, by route served', ['route', 'stage'])
+MODEL_INFERENCE_SECONDS = registry.histogram('ml_service_model_inference_seconds', 'predict_proba latency per ensemble member', ['model'])
+TRAINING_SECONDS = registry.gauge('ml_service_training_duration_seconds', 'Fit wall time per model in the last train_models() run', ['model'])
+TRAINING_TOTAL_SECONDS = registry.gauge('ml_service_training_total_seconds', 'Wall time of the last train_models() run')
+TUNING_SECONDS = registry.gauge('ml_service_tuning_duration_seconds', 'Wall time of the last hyperparameter search')
+MODEL_TIMEOUTS = registry.counter('ml_service_model_timeouts_total', 'Ensemble members left out of a /predict result by its deadline', ['model'])
+MODEL_ACCURACY = registry.gauge('ml_service_model_accuracy', 'Holdout accuracy per model in the last train_models() run', ['model'])
+FEEDBACK_ROWS = registry.counter('ml_service_feedback_rows_total', 'Labeled feedback rows by outcome (queued, rejected)', ['status'])
+FEEDBACK_UPDATE_SECONDS = registry.histogram('ml_service_feedback_update_seconds', 'Wall time of one online update, from mini-batch to live ModelSet')
+FEEDBACK_PENDING_ROWS = registry.gauge('ml_service_feedback_pending_rows', 'Feedback rows received but not yet in the live models')
+FEEDBACK_STALENESS_SECONDS = registry.gauge('ml_service_feedback_staleness_seconds', 'Age of the oldest feedback row not yet in the live models')
+
+# On-demand profiling of prediction requests, off unless PROFILE_TOKEN is set
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_TOP_FUNCTIONS = 25
+
+# Background retraining: one job at a time, last few jobs kept for /train/status
+training_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='retrain')
+training_lock = threading.Lock()
+training_jobs = {}
+MAX_TRAINING_JOBS = 20
+
+# Progress steps reported by train_models(): data, scaling, four fits, saving
+TRAINING_STEPS = 7
+
+# Model fits run concurrently in a process pool of TRAIN_WORKERS (1 = fit serially
+# in-process); TRAIN_RF_JOBS is the RandomForest's own n_jobs while fitting
+TRAIN_WORKERS = int(os.environ.get('TRAIN_WORKERS', min(4, os.cpu_count() or 1)))
+TRAIN_RF_JOBS = int(os.environ.get('TRAIN_RF_JOBS', -1))
+
+# Engine for the svm slot: 'svc' (exact), or 'nystroem' / 'rff' kernel approximations
+SVM_ENGINE = os.environ.get('SVM_ENGINE', 'svc')
+SVM_COMPONENTS = int(os.environ.get('SVM_COMPONENTS', 300))
 
-def create_sample_data():
+# Out-of-core training (POST /train with {"mode": "incremental"}): rows are streamed in
+# chunks of INCREMENTAL_CHUNK_SIZE, every fifth row is held out for scoring up to
+# INCREMENTAL_HOLDOUT_ROWS, and data_path files must live under TRAIN_DATA_DIR
+INCREMENTAL_CHUNK_SIZE = int(os.environ.get('INCREMENTAL_CHUNK_SIZE', 100000))
+INCREMENTAL_HOLDOUT_ROWS = int(os.environ.get('INCREMENTAL_HOLDOUT_ROWS', 200000))
+INCREMENTAL_EPOCHS = int(os.environ.get('INCREMENTAL_EPOCHS', 1))
+
+# Incremental sets are saved apart from the full ensemble, so they never overwrite it and a
+# restart loads the full ensemble again; workers follow whichever of the two was saved last
+INCREMENTAL_MODEL_DIR = os.path.join('models', 'incremental')
+MODEL_DIRS = ('models', INCREMENTAL_MODEL_DIR)
+
+# Hyperparameter search before a full retrain, for /train {"tune": true} or every full retrain
+# with TUNE_HYPERPARAMETERS=1: TUNE_CANDIDATES configurations per model, successive halving by a
+# factor of TUNE_FACTOR from TUNE_MIN_ROWS rows over TUNE_FOLDS folds, on TUNE_WORKERS processes.
+# The winners are saved to models/best_params.json and used by later full retrains.
+TUNE_HYPERPARAMETERS = os.environ.get('TUNE_HYPERPARAMETERS', '0') == '1'
+TUNE_CANDIDATES = int(os.environ.get('TUNE_CANDIDATES', 20))
+TUNE_FOLDS = int(os.environ.get('TUNE_FOLDS', 3))
+TUNE_FACTOR = int(os.environ.get('TUNE_FACTOR', 3))
+TUNE_MIN_ROWS = int(os.environ.get('TUNE_MIN_ROWS', 50))
+TUNE_WORKERS = int(os.environ.get('TUNE_WORKERS', os.cpu_count() or 1))
+TRAIN_DATA_DIR = os.environ.get('TRAIN_DATA_DIR', 'data')
+
+# Answer /predict/mental-health from a precomputed table of every combination of the four
+# questionnaire totals, built at startup or read from MENTAL_HEALTH_OUTCOME_TABLE_PATH
+# (written there on first start when the file does not exist)
+MENTAL_HEALTH_OUTCOME_TABLE = os.environ.get('MENTAL_HEALTH_OUTCOME_TABLE', '0') == '1'
+MENTAL_HEALTH_OUTCOME_TABLE_PATH = os.environ.get('MENTAL_HEALTH_OUTCOME_TABLE_PATH') or None
+
+# Online learning from labeled outcomes posted to /feedback. Rows wait in a queue of at most
+# FEEDBACK_QUEUE_SIZE and are applied in mini-batches of up to FEEDBACK_BATCH_SIZE, at the latest
+# FEEDBACK_INTERVAL_SECONDS after the first of them arrived, to the linear member FEEDBACK_MODEL.
+# Each update saves the member's online state to FEEDBACK_STATE_PATH, where sibling workers
+# (through their model watcher) and restarts pick it up; a retrain starts over from scratch.
+FEEDBACK_ENABLED = os.environ.get('FEEDBACK_ENABLED', '0') == '1'
+FEEDBACK_QUEUE_SIZE = int(os.environ.get('FEEDBACK_QUEUE_SIZE', 10000))
+FEEDBACK_BATCH_SIZE = int(os.environ.get('FEEDBACK_BATCH_SIZE', 256))
+FEEDBACK_INTERVAL_SECONDS = float(os.environ.get('FEEDBACK_INTERVAL_SECONDS', 30))
+FEEDBACK_MODEL = os.environ.get('FEEDBACK_MODEL', 'logistic_regression')
+FEEDBACK_LEARNING_RATE = float(os.environ.get('FEEDBACK_LEARNING_RATE', 0.01))
+FEEDBACK_ALPHA = float(os.environ.get('FEEDBACK_ALPHA', 1e-4))
+FEEDBACK_STATE_PATH = 'models/feedback.pkl'
+
+def create_sample_data(n_samples=1000, seed=42):
     """Create sample diabetes dataset for training models"""
-    np.random.seed(42)
+    np.random.seed(seed)
 
     # Generate sample data similar to Pima Indians Diabetes dataset
-    n_samples = 1000
-
-    data = {
-        'Pregnancies': np.random.randint(0, 17, n_samples),
-        'Glucose': np.random.normal(120, 30, n_samples).clip(0, 200),
-        'BloodPressure': np.random.normal(70, 15, n_samples).clip(0, 122),
-        'SkinThickness': np.random.normal(20, 15, n_samples).clip(0, 99),
-        'Insulin': np.random.normal(80, 115, n_samples).clip(0, 846),
-        'BMI': np.random.normal(32, 8, n_samples).clip(0, 67),
-        'DiabetesPedigreeFunction': np.random.exponential(0.5, n_samples).clip(0.078, 2.42),
-        'Age': np.random.normal(33, 12, n_samples).clip(21, 81)
+    df = generate_features(n_samples, np.random)
+
+    # Create target based on risk factors
+    return add_outcome(df)
+
+class ModelSet:
+    """A fitted scaler and the ensemble trained with it.
+
+    A ModelSet is never modified after it is built. Retraining builds a new one
+    and publishes it with a single reference assignment, so a request that read
+    ``model_set`` once always sees a matching scaler and set of models.
+    ``online`` is the OnlineLinearModel of a set built from feedback.
+
+    ``explainer`` holds the precomputed state for per-feature explanations. It is
+    built from ``background`` (the scaled row explanations are relative to) on
+    first use, so workers that never explain never pay for it; that is the one
+    thing about a ModelSet that is filled in after it is published.
+    """
+
+    def __init__(self, models, scaler, version, accuracies=None, trained_at=None, training_stats=None,
+                 explainer=None, online=None, background=None):
+        self.models = models
+        self.scaler = scaler
+        self.background = background
+        self._explainer = explainer
+        self._explainer_lock = threading.Lock()
+        self.online = online
+        self.version = version
+        self.accuracies = accuracies or {}
+        self.trained_at = trained_at
+        self.training_stats = training_stats or {}
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    self._explainer = Explainer(self.models, self.background, self.version)
+        return self._explainer
+
+def build_estimators(params=None):
+    """Unfitted estimators for every slot of the ensemble, with optional {name: params} overrides"""
+    estimators = {
+        'logistic_regression': LogisticRegression(random_state=42),
+        'random_forest': RandomForestClassifier(n_estimators=100, n_jobs=TRAIN_RF_JOBS, random_state=42),
+        'gradient_boosting': GradientBoostingClassifier(random_state=42),
+        'svm': build_svm(SVM_ENGINE)
     }
+    for name, overrides in (params or {}).items():
+        estimators[name].set_params(**overrides)
+    return estimators
 
-    df = pd.DataFrame(data)
+def build_svm(engine='svc'):
+    """Estimator for the ensemble's svm slot.
 
-    # Create target based on risk factors
-    risk_score = (
-        (df['Glucose'] > 140).astype(int) * 0.25 +
-        (df['BMI'] > 30).astype(int) * 0.2 +
-        (df['Age'] > 45).astype(int) * 0.2 +
-        (df['BloodPressure'] > 90).astype(int) * 0.15 +
-        (df['Pregnancies'] > 5).astype(int) * 0.1 +
-        (df['Insulin'] > 150).astype(int) * 0.1
-    )
+    'svc' is the exact RBF SVC with built-in Platt scaling, which fits in roughly
+    quadratic time and predicts in time proportional to its support vectors.
+    'nystroem' and 'rff' approximate the same RBF kernel with an explicit feature
+    map and a separately calibrated linear SVM (see kernel_svm.KernelApproxSVM),
+    so fit time grows linearly with the data and per-row cost is fixed by
+    SVM_COMPONENTS.
+    """
+    if engine == 'svc':
+        return SVC(probability=True, random_state=42)
+
+    # Same kernel width as SVC(gamma='scale') on standardized features
+    return KernelApproxSVM(method=engine, n_components=SVM_COMPONENTS, gamma=1.0 / len(FEATURES), random_state=42)
+
+def _fit_model(name, model, X_train, y_train, X_test, y_test, trace_memory=False):
+    """Fit and score one model, recording wall time, CPU time and peak memory
+
+    tracemalloc sees every allocation in the process, so ``trace_memory`` is only
+    set in pool children; on the serving process it would slow live requests and
+    count their allocations too.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
 
-    df['Outcome'] = (risk_score > 0.4).astype(int)
+    model.fit(X_train, y_train)
 
-    return df
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+    peak_bytes = None
+    if trace_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
 
-def train_models():
-    """Train multiple ML models for diabetes prediction"""
-    global models, scaler
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+
+    # Parallelism only pays off while fitting; single-row inference is faster sequential
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=None)
+
+    return name, model, accuracy, {
+        'wall_seconds': round(wall_seconds, 3),
+        'cpu_seconds': round(cpu_seconds, 3),
+        # Python/NumPy allocations during fit (pool children only), and the fitting process's RSS high-water mark
+        'peak_memory_mb': round(peak_bytes / 1024 / 1024, 2) if peak_bytes is not None else None,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    }
+
+def train_models(progress=None, tune=None):
+    """Train multiple ML models for diabetes prediction and return them as a new ModelSet
+
+    With ``tune`` (default TUNE_HYPERPARAMETERS) a hyperparameter search on the
+    training rows picks every model's settings first; otherwise the settings
+    saved by the last search are used, if any.
+    """
+    tune = TUNE_HYPERPARAMETERS if tune is None else tune
+    # Tuning is one more step, between scaling and fitting
+    total_steps = TRAINING_STEPS + (1 if tune else 0)
+
+    def report(step, message):
+        if progress is not None:
+            if tune and step >= 2:
+                step += 1
+            progress(step, total_steps, message)
 
     print("Training diabetes prediction models...")
+    train_start = time.perf_counter()
 
     # Create sample dataset
+    report(0, 'Generating training data')
     df = create_sample_data()
 
-    X = df[FEATURES]
-    y = df['Outcome']
+    X = df[FEATURES].values
+    y = df['Outcome'].values
 
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # Scale features
+    report(1, 'Scaling features')
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
 
-    # Train models
-    models['logistic_regression'] = LogisticRegression(random_state=42)
-    models['random_forest'] = RandomForestClassifier(n_estimators=100, random_state=42)
-    models['gradient_boosting'] = GradientBoostingClassifier(random_state=42)
-    models['svm'] = SVC(probability=True, random_state=42)
+    tuning = None
+    if tune:
+        if progress is not None:
+            def tuning_progress(done, total):
+                progress(2 + done / total, total_steps, 'Tuning hyperparameters')
+        else:
+            tuning_progress = None
+        print(f"Tuning hyperparameters on {TUNE_WORKERS} worker(s)...")
+        tuning = tune_models(build_estimators(), X_train, y_train, n_candidates=TUNE_CANDIDATES,
+                             n_folds=TUNE_FOLDS, factor=TUNE_FACTOR, min_rows=TUNE_MIN_ROWS,
+                             workers=TUNE_WORKERS, progress=tuning_progress)
+        TUNING_SECONDS.set(tuning['wall_seconds'])
+        for name, result in tuning['models'].items():
+            print(f"{name}: best {result['best_params']}, cv roc_auc {result['cv_roc_auc']:.4f}")
+        print(f"Tuning finished: {tuning['trials']} trials in {tuning['wall_seconds']:.2f}s")
+        params = tuning['best_params']
+    else:
+        params = load_best_params('models/best_params.json', build_estimators())
 
+    # Train models, concurrently in the process pool unless TRAIN_WORKERS=1
+    estimators = build_estimators(params)
+    models = {}
     accuracies = {}
+    model_stats = {}
+
+    def collect(results):
+        for done, (name, model, accuracy, stats) in enumerate(results, start=1):
+            accuracies[name] = accuracy
+            model_stats[name] = dict(stats, accuracy=accuracy)
+            models[name] = model
+            peak = stats['peak_memory_mb']
+            print(f"{name}: accuracy {accuracy:.3f}, wall {stats['wall_seconds']:.2f}s, "
+                  f"cpu {stats['cpu_seconds']:.2f}s" + (f", peak {peak:.1f} MB" if peak is not None else ''))
+            # The last fit ends the step, and saving starts the next one
+            if done < len(estimators):
+                report(2 + done, f'Fitting models ({done}/{len(estimators)} done)')
+
+    report(2, 'Fitting models')
+    if TRAIN_WORKERS > 1:
+        # spawn rather than fork: the service has live threads, and a fresh interpreter
+        # is the only start method that stays safe inside forked gunicorn workers
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(TRAIN_WORKERS, len(estimators)), mp_context=context) as pool:
+            futures = [
+                pool.submit(_fit_model, name, model, X_train_scaled, y_train, X_test_scaled, y_test, True)
+                for name, model in estimators.items()
+            ]
+            collect(future.result() for future in as_completed(futures))
+    else:
+        collect(
+            _fit_model(name, model, X_train_scaled, y_train, X_test_scaled, y_test)
+            for name, model in estimators.items()
+        )
+
+    # Keep the ensemble in its usual order regardless of completion order
+    models = {name: models[name] for name in estimators}
+
+    for name, stats in model_stats.items():
+        TRAINING_SECONDS.set(stats['wall_seconds'], model=name)
+        MODEL_ACCURACY.set(stats['accuracy'], model=name)
+    TRAINING_TOTAL_SECONDS.set(round(time.perf_counter() - train_start, 3))
+
+    # Explanation background: the mean of the scaled training rows
+    version = uuid.uuid4().hex[:12]
+    new_set = ModelSet(models, scaler, version, accuracies, time.time(), background=X_train_scaled.mean(axis=0))
+    new_set.training_stats = {
+        'models': model_stats,
+        'params': params,
+        'fit_wall_seconds': round(time.perf_counter() - train_start, 3)
+    }
+    if tuning is not None:
+        new_set.training_stats['tuning'] = tuning
+
+    # Save models
+    report(2 + len(estimators), 'Saving models')
+    save_models(new_set)
+
+    print(f"Models trained and saved successfully in {time.perf_counter() - train_start:.2f}s!")
+    return new_set
 
+def build_incremental_estimators():
+    """Unfitted partial_fit estimators for out-of-core training.
+
+    Two models instead of the full ensemble's four: under the majority vote of
+    build_prediction, where a tie counts as diabetes, a row is flagged as soon
+    as either of them predicts diabetes.
+    """
+    return {
+        'logistic_regression': SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42),
+        'linear_svm': SGDClassifier(loss='modified_huber', alpha=1e-5, random_state=42)
+    }
+
+def _split_chunk(chunk, offset):
+    """Training and holdout rows of a chunk; every fifth row of the source is held out"""
+    X = chunk[FEATURES].to_numpy(dtype=np.float64)
+    y = chunk['Outcome'].to_numpy()
+    holdout = np.arange(offset, offset + len(X)) % 5 == 0
+    return X[~holdout], y[~holdout], X[holdout], y[holdout]
+
+def train_models_incremental(source, progress=None, epochs=1):
+    """Train partial_fit models chunk by chunk and return them as a new ModelSet.
+
+    The source is read once to fit the scaler and once per epoch to fit the
+    models. Only one chunk and the capped holdout set are in memory at a time, so
+    peak memory follows INCREMENTAL_CHUNK_SIZE rather than the number of rows.
+    """
+    total = epochs + 2
+    chunks = len(source) if hasattr(source, '__len__') else None
+
+    def report(step, message, chunk_index=0):
+        if progress is not None:
+            if chunks:
+                # The last chunk ends the step, and the next message starts the next one
+                if chunk_index >= chunks:
+                    return
+                step += chunk_index / chunks
+            progress(step, total, message)
+
+    print(f"Training incremental diabetes models from {source.describe()}...")
+    train_start = time.perf_counter()
+    # The process high-water mark, not tracemalloc: tracing every allocation of a
+    # multi-minute run would slow the /predict requests served alongside it
+    max_rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Pass 1: scaler statistics, and the holdout rows kept aside for scoring
+    report(0, 'Fitting scaler')
+    scaler = StandardScaler()
+    holdout_X, holdout_y = [], []
+    held_rows = rows_trained = offset = 0
+    for index, chunk in enumerate(source):
+        X_train, _, X_test, y_test = _split_chunk(chunk, offset)
+        offset += len(chunk)
+        if len(X_train):
+            scaler.partial_fit(X_train)
+            rows_trained += len(X_train)
+        if held_rows < INCREMENTAL_HOLDOUT_ROWS and len(X_test):
+            keep = INCREMENTAL_HOLDOUT_ROWS - held_rows
+            holdout_X.append(X_test[:keep])
+            holdout_y.append(y_test[:keep])
+            held_rows += len(holdout_X[-1])
+        report(0, 'Fitting scaler', index + 1)
+
+    if not rows_trained:
+        raise ValueError('Training data source has no rows')
+
+    # Passes 2+: one partial_fit per model and chunk
+    models = build_incremental_estimators()
+    fit_seconds = dict.fromkeys(models, 0.0)
+    classes = np.array([0, 1])
+    for epoch in range(epochs):
+        message = f'Fitting models (epoch {epoch + 1}/{epochs})'
+        report(1 + epoch, message)
+        offset = 0
+        for index, chunk in enumerate(source):
+            X_train, y_train, _, _ = _split_chunk(chunk, offset)
+            offset += len(chunk)
+            if not len(X_train):
+                continue
+            X_scaled = scaler.transform(X_train)
+            for name, model in models.items():
+                start = time.perf_counter()
+                model.partial_fit(X_scaled, y_train, classes=classes)
+                fit_seconds[name] += time.perf_counter() - start
+            report(1 + epoch, message, index + 1)
+
+    X_test = scaler.transform(np.concatenate(holdout_X))
+    y_test = np.concatenate(holdout_y)
+    del holdout_X, holdout_y
+
+    accuracies = {}
+    model_stats = {}
     for name, model in models.items():
-        model.fit(X_train_scaled, y_train)
-        y_pred = model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
+        # Score the way the service does, labels from the probabilities
+        accuracy = accuracy_score(y_test, np.argmax(model_predict_proba(model, X_test), axis=1))
         accuracies[name] = accuracy
-        print(".3f")
+        model_stats[name] = {'wall_seconds': round(fit_seconds[name], 3), 'accuracy': accuracy}
+        print(f"{name}: accuracy {accuracy:.3f}, partial_fit {fit_seconds[name]:.2f}s")
 
-    # Save models
-    os.makedirs('models', exist_ok=True)
-    joblib.dump(models, 'models/diabetes_models.pkl')
-    joblib.dump(scaler, 'models/scaler.pkl')
+    max_rss_end = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
 
-    print("Models trained and saved successfully!")
-    return accuracies
+    for name, stats in model_stats.items():
+        TRAINING_SECONDS.set(stats['wall_seconds'], model=name)
+        MODEL_ACCURACY.set(stats['accuracy'], model=name)
+    TRAINING_TOTAL_SECONDS.set(round(time.perf_counter() - train_start, 3))
 
-def load_models():
-    """Load trained models from disk"""
-    global models, scaler
+    # The scaled training mean is the origin, since the scaler saw every training row
+    version = uuid.uuid4().hex[:12]
+    new_set = ModelSet(models, scaler, version, accuracies, time.time(), background=np.zeros(len(FEATURES)))
+    new_set.training_stats = {
+        'mode': 'incremental',
+        'source': source.describe(),
+        'epochs': epochs,
+        'rows_trained': rows_trained,
+        'rows_holdout': len(y_test),
+        'models': model_stats,
+        'fit_wall_seconds': round(time.perf_counter() - train_start, 3),
+        # How far the run raised the process RSS high-water mark (0 when it stayed below an
+        # earlier peak), and that high-water mark
+        'max_rss_growth_mb': round((max_rss_end - max_rss_start) / 1024, 2),
+        'max_rss_mb': round(max_rss_end / 1024, 2)
+    }
 
+    report(total - 1, 'Saving models')
+    save_models(new_set, INCREMENTAL_MODEL_DIR)
+
+    print(f"Incremental models trained on {rows_trained} rows and saved in {time.perf_counter() - train_start:.2f}s!")
+    return new_set
+
+def _dump_atomic(value, path):
+    """joblib.dump to a temporary file and rename it over path"""
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    joblib.dump(value, tmp_path)
+    os.replace(tmp_path, path)
+
+def model_dir(current):
+    """Directory a ModelSet's artifacts are saved in"""
+    return INCREMENTAL_MODEL_DIR if current.training_stats.get('mode') == 'incremental' else 'models'
+
+def save_models(new_set, directory='models'):
+    """Write a ModelSet to a models directory"""
+    os.makedirs(directory, exist_ok=True)
+    _dump_atomic(new_set.models, os.path.join(directory, 'diabetes_models.pkl'))
+    _dump_atomic(new_set.scaler, os.path.join(directory, 'scaler.pkl'))
+    if new_set.training_stats.get('tuning'):
+        save_best_params(os.path.join(directory, 'best_params.json'), new_set.training_stats['tuning'], new_set.models)
+
+    # Uncompressed, array-backed copy of the ensemble for MODEL_MMAP=1 workers
+    _dump_atomic(to_shared_models(new_set.models), os.path.join(directory, 'diabetes_models_shared.pkl'))
+
+    tmp_path = os.path.join(directory, f'metadata.json.tmp-{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'version': new_set.version,
+            'accuracies': new_set.accuracies,
+            'trained_at': new_set.trained_at,
+            'training_stats': new_set.training_stats,
+            'explanation_background': new_set.background.tolist()
+        }, f)
+    os.replace(tmp_path, os.path.join(directory, 'metadata.json'))
+
+def activate_model_set(new_set, replaces=None):
+    """Publish a ModelSet to the serving path with one atomic reference swap.
+
+    With ``replaces``, only if that set is still the live one; returns whether the swap happened.
+    """
+    global model_set
+    with model_set_lock:
+        if replaces is not None and model_set is not replaces:
+            return False
+        model_set = new_set
+
+    # Cached results belong to the previous set
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    print(f"Model set {new_set.version} is now live")
+    return True
+
+def read_model_set(directory='models'):
+    """Read a saved ModelSet from disk, memory-mapping its arrays when MODEL_MMAP is set"""
+    models_path = os.path.join(directory, 'diabetes_models.pkl')
+    shared_path = os.path.join(directory, 'diabetes_models_shared.pkl')
+    if MODEL_MMAP:
+        if not os.path.exists(shared_path):
+            _dump_atomic(to_shared_models(joblib.load(models_path)), shared_path)
+        # Copy-on-write mapping: pages stay shared between workers as long as nobody writes
+        # to them, and libsvm still gets the writable buffers it insists on
+        loaded_models = joblib.load(shared_path, mmap_mode='c')
+    else:
+        loaded_models = joblib.load(models_path)
+    loaded_scaler = joblib.load(os.path.join(directory, 'scaler.pkl'))
+
+    try:
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        metadata = {'version': f"{int(os.path.getmtime(models_path)):x}"}
+
+    # Artifacts saved without a background: the scaled training mean is the origin
+    background = np.array(metadata.get('explanation_background') or np.zeros(len(FEATURES)), dtype=np.float64)
+    loaded = ModelSet(
+        loaded_models, loaded_scaler, metadata['version'],
+        metadata.get('accuracies'), metadata.get('trained_at'), metadata.get('training_stats'),
+        background=background
+    )
+
+    # Online updates made on top of exactly this set
+    state = read_feedback_state(loaded.version) if FEEDBACK_ENABLED else None
+    if state is not None:
+        return feedback_model_set(loaded, state['online'], state['feedback'], state['version'])
+    return loaded
+
+def load_models():
+    """Load the full ensemble from disk, training it first if there is none"""
+    # Only saves after this point are news to the model watcher
+    remember_saved_models()
     try:
-        models = joblib.load('models/diabetes_models.pkl')
-        scaler = joblib.load('models/scaler.pkl')
+        activate_model_set(read_model_set())
         print("Models loaded successfully!")
         return True
-    except:
+    except Exception:
         print("Models not found, training new models...")
-        train_models()
+        new_set = train_models()
+        activate_model_set(read_model_set() if MODEL_MMAP else new_set)
         return True
 
+def saved_model_version(directory='models'):
+    """Version in a models directory's metadata.json, or None while there is no readable one"""
+    try:
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
+
+def reload_saved_models(directory='models'):
+    """Load, warm and publish the ModelSet saved in directory if it differs from the live one.
+
+    Returns whether a new set went live. save_models() writes metadata.json last,
+    so a version change means the rest of the artifacts are already in place.
+    """
+    current = model_set
+    version = saved_model_version(directory)
+    if current is None or version is None or version == feedback_base_version(current):
+        return False
+    with training_lock:
+        # This process is saving the set itself and publishes it when done
+        if any(job['state'] == 'running' for job in training_jobs.values()):
+            return False
+
+    new_set = read_model_set(directory)
+    timings = warmup_models(new_set)
+    if not activate_model_set(new_set, replaces=current):
+        return False
+    mark_ready(timings)
+    print(f"Reloaded model set {new_set.version} saved by another process")
+    return True
+
+# Per-process watcher thread; threads do not survive gunicorn's fork, so it is started lazily.
+# mtimes are those of the last save this process has seen; forked workers inherit the master's.
+model_watcher = {'pid': None, 'thread': None, 'mtimes': {}}
+model_watcher_lock = threading.Lock()
+
+def watched_files():
+    """(path, reload function) for every saved file the model watcher follows"""
+    watched = [(os.path.join(directory, 'metadata.json'), functools.partial(reload_saved_models, directory))
+               for directory in MODEL_DIRS]
+    if FEEDBACK_ENABLED:
+        watched.append((FEEDBACK_STATE_PATH, reload_saved_feedback))
+    return watched
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def remember_saved_models():
+    """Mark the files saved so far as seen, so the watcher only loads later saves"""
+    for path, _ in watched_files():
+        model_watcher['mtimes'][path] = file_mtime(path)
+
+def watch_saved_models():
+    """Poll the modification times of the saved models and feedback state and load what changed"""
+    watched = watched_files()
+    while True:
+        time.sleep(MODEL_RELOAD_INTERVAL)
+        for path, reload in watched:
+            mtime = file_mtime(path)
+            if mtime is None or mtime == model_watcher['mtimes'].get(path):
+                continue
+            try:
+                reload()
+                model_watcher['mtimes'][path] = mtime
+            except Exception as e:
+                # Retried on the next poll, e.g. when another save replaced a file mid-read
+                print(f"Model reload error: {str(e)}")
+
+def ensure_model_watcher():
+    """Start this process's watch_saved_models thread if it is not running"""
+    if MODEL_RELOAD_INTERVAL <= 0 or (model_watcher['pid'] == os.getpid() and model_watcher['thread'].is_alive()):
+        return
+    with model_watcher_lock:
+        if model_watcher['pid'] != os.getpid() or not model_watcher['thread'].is_alive():
+            model_watcher['pid'] = os.getpid()
+            model_watcher['thread'] = threading.Thread(target=watch_saved_models, name='model-watcher', daemon=True)
+            model_watcher['thread'].start()
+
+def warmup_models(target=None):
+    """Run warmup inferences through every model of a ModelSet and time them"""
+    target = target or model_set
+    sample = np.tile(target.scaler.mean_, (WARMUP_BATCH_SIZE, 1))
+
+    timings = {}
+    for batch_size in (1, WARMUP_BATCH_SIZE):
+        input_data = sample[:batch_size]
+        input_scaled = target.scaler.transform(input_data)
+        for name, model in target.models.items():
+            start = time.perf_counter()
+            for _ in range(WARMUP_ROUNDS):
+                model_predict_proba(model, input_scaled)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / WARMUP_ROUNDS
+            timings.setdefault(name, {})[f'batch_{batch_size}_ms'] = round(elapsed_ms, 3)
+
+        # Exercise the response path as well
+        probas = ensemble_probabilities(input_data, target)
+        build_prediction(dict(zip(FEATURES, input_data[0])), probas, 0)
+
+    print(f"Warmup finished for model set {target.version}: {timings}")
+    return timings
+
+def mark_ready(timings):
+    """Record warmup results and open the service to traffic"""
+    warmup_stats.clear()
+    warmup_stats.update(timings)
+    service_ready.set()
+
+def _run_training_job(job, trainer):
+    """Build a new ModelSet off to the side and swap it in when complete"""
+    def progress(step, total, message):
+        now = time.time()
+        with training_lock:
+            # Timings are per message; a step that only advances within one message keeps its clock
+            current = job['progress']['current']
+            if message != current:
+                if current:
+                    job['timings'][current] = round(now - job['_step_started'], 3)
+                job['_step_started'] = now
+            job['progress'] = {
+                'step': round(step, 3),
+                'total': total,
+                'percent': round(100 * step / total, 1),
+                'current': message
+            }
+
+    with training_lock:
+        job['state'] = 'running'
+        job['started_at'] = time.time()
+        job['_step_started'] = job['started_at']
+
+    try:
+        new_set = trainer(progress=progress)
+        if MODEL_MMAP:
+            # Serve the freshly saved artifacts through the shared mapping
+            new_set = read_model_set(model_dir(new_set))
+
+        # Warm the new set before it takes traffic
+        timings = warmup_models(new_set)
+        activate_model_set(new_set)
+        mark_ready(timings)
+
+        finished = time.time()
+        with training_lock:
+            job['timings'][job['progress']['current']] = round(finished - job['_step_started'], 3)
+            job['state'] = 'succeeded'
+            job['accuracies'] = new_set.accuracies
+            job['training_stats'] = new_set.training_stats
+            job['model_version'] = new_set.version
+            total = job['progress']['total']
+            job['progress'] = {'step': total, 'total': total, 'percent': 100.0, 'current': None}
+    except Exception as e:
+        print(f"Retraining error: {str(e)}")
+        finished = time.time()
+        with training_lock:
+            job['state'] = 'failed'
+            job['error'] = str(e)
+
+    with training_lock:
+        job['finished_at'] = finished
+        job['duration_seconds'] = round(finished - job['started_at'], 3)
+
+def start_training_job(trainer=train_models, mode='full', source=None):
+    """Queue a background retrain, or return the one already queued or running"""
+    with training_lock:
+        for job in training_jobs.values():
+            if job['state'] in ('queued', 'running'):
+                return job, False
+
+        job = {
+            'job_id': uuid.uuid4().hex[:12],
+            'state': 'queued',
+            'mode': mode,
+            'source': source,
+            'progress': {'step': 0, 'total': TRAINING_STEPS, 'percent': 0.0, 'current': None},
+            'timings': {},
+            'accuracies': None,
+            'training_stats': None,
+            'model_version': None,
+            'error': None,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'duration_seconds': None
+        }
+        training_jobs[job['job_id']] = job
+
+        # Keep only the most recent jobs
+        while len(training_jobs) > MAX_TRAINING_JOBS:
+            del training_jobs[next(iter(training_jobs))]
+
+        job['_future'] = training_executor.submit(_run_training_job, job, trainer)
+
+    return job, True
+
+def job_status(job):
+    """Public view of a training job"""
+    with training_lock:
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+def profiled(view):
+    """Run a prediction view under cProfile when the request carries the profiling token.
+
+    Profiling is requested with an ``X-Profile-Token`` header or a ``profile_token``
+    query parameter matching PROFILE_TOKEN. Without PROFILE_TOKEN configured the view
+    is returned undecorated, so normal requests pay nothing. Profiled requests score
+    the models sequentially on the request thread, even in parallel or deadline mode,
+    because cProfile does not follow work onto model_executor threads.
+    """
+    if not PROFILE_TOKEN:
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Profile-Token') or request.args.get('profile_token')
+        if token is None:
+            return view(*args, **kwargs)
+        if not hmac.compare_digest(token, PROFILE_TOKEN):
+            return jsonify({'error': 'Invalid profiling token'}), 403
+        return run_profiled(view, *args, **kwargs)
+
+    return wrapper
+
+def run_profiled(view, *args, **kwargs):
+    """Call a view under cProfile and attach a per-function and per-model cost breakdown"""
+    profile_id = uuid.uuid4().hex[:12]
+    g.profile = {'models_ms': {}}
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    response = app.make_response(profiler.runcall(view, *args, **kwargs))
+    total_ms = (time.perf_counter() - start) * 1000
+
+    stats = pstats.Stats(profiler)
+    functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    report = {
+        'profile_id': profile_id,
+        'route': request.path,
+        'total_ms': round(total_ms, 3),
+        'models_ms': g.profile['models_ms'],
+        'top_functions': [
+            {
+                'function': f'{filename}:{line}({name})',
+                'calls': calls,
+                'self_ms': round(self_time * 1000, 3),
+                'cumulative_ms': round(cumulative * 1000, 3)
+            }
+            for (filename, line, name), (_, calls, self_time, cumulative, _) in functions[:PROFILE_TOP_FUNCTIONS]
+        ]
+    }
+
+    # Keep the raw stats for snakeviz / gprof2dot and the summary next to them
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stats.dump_stats(os.path.join(PROFILE_DIR, f'{profile_id}.prof'))
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Profiled {request.path} in {total_ms:.2f}ms, saved to {PROFILE_DIR}/{profile_id}.prof")
+
+    body = response.get_json(silent=True)
+    if isinstance(body, dict):
+        body['profile'] = report
+        response.set_data(app.json.dumps(body))
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    ensure_model_watcher()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every request and observe its latency, labelled by route template"""
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    if response.status_code >= 400:
+        REQUEST_ERRORS.inc(route=route)
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, route=route)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, per-stage latency and training metrics in the Prometheus text format"""
+    if feedback_learner is not None:
+        staleness = feedback_learner.stats()['staleness']
+        FEEDBACK_PENDING_ROWS.set(staleness['pending_rows'])
+        FEEDBACK_STALENESS_SECONDS.set(staleness['oldest_pending_seconds'])
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, 503 until models are loaded and warmed up"""
+    ready = service_ready.is_set() and model_set is not None
+
     return jsonify({
-        'status': 'healthy',
-        'models_loaded': len(models) > 0,
-        'scaler_loaded': scaler is not None
-    })
+        'status': 'healthy' if ready else 'starting',
+        'ready': ready,
+        'models_loaded': model_set is not None and len(model_set.models) > 0,
+        'scaler_loaded': model_set is not None and model_set.scaler is not None,
+        'model_version': model_set.version if model_set is not None else None,
+        'warmup': warmup_stats
+    }), 200 if ready else 503
 
 @app.route('/predict', methods=['POST'])
+@profiled
 def predict_diabetes():
     """Predict diabetes risk using multiple ML models"""
     try:
-        data = request.get_json()
+        with stage_timer('parse'):
+            try:
+                data = decode_body(request, len(FEATURES))
+            except PayloadError as e:
+                return jsonify({'error': str(e)}), e.status
 
-        if not data:
+        if data is None or len(data) == 0:
             return jsonify({'error': 'No data provided'}), 400
 
         # Extract features
-        features = {}
-        for feature in FEATURES:
-            if feature not in data:
-                return jsonify({'error': f'Missing required feature: {feature}'}), 400
-            features[feature] = float(data[feature])
-
-        # Convert to array
-        input_data = np.array([[features[feature] for feature in FEATURES]])
-
-        # Scale features
-        input_scaled = scaler.transform(input_data)
-
-        # Get predictions from all models
-        predictions = {}
-        probabilities = {}
-
-        for name, model in models.items():
-            pred = model.predict(input_scaled)[0]
-            prob = model.predict_proba(input_scaled)[0]
-
-            predictions[name] = int(pred)
-            probabilities[name] = {
-                'no_diabetes': float(prob[0]),
-                'diabetes': float(prob[1])
+        with stage_timer('validation'):
+            if isinstance(data, np.ndarray):
+                if len(data) != 1:
+                    return jsonify({'error': 'Send exactly one row to /predict, use /predict/batch for more'}), 400
+                input_data = data
+                features = dict(zip(FEATURES, data[0].tolist()))
+            else:
+                try:
+                    features = parse_features(data)
+                except FeatureError as e:
+                    return jsonify({'error': str(e)}), 400
+
+                # Convert to array
+                input_data = np.array([[features[feature] for feature in FEATURES]])
+
+        current = model_set
+        cascade = cascade_requested()
+        try:
+            deadline = prediction_deadline()
+        except ValueError:
+            return jsonify({'error': 'Invalid latency budget'}), 400
+        # A profiled request runs its own models, bypassing the batcher and the cache, and
+        # scores them sequentially: cProfile only sees the thread it was started on
+        profile = g.get('profile') if PROFILE_TOKEN else None
+        parallel = not cascade and profile is None and (PARALLEL_MODELS_ENABLED or deadline is not None)
+
+        def compute():
+            if cascade:
+                # Stops per row, so it does not share the batcher's all-models pass
+                return build_cascade_prediction(features, cascade_probabilities(input_data, current, profile), 0)
+            if parallel:
+                probas, timed_out = parallel_probabilities(input_data, current, deadline, profile)
+                if not probas:
+                    raise DeadlineExceeded('No model finished within the latency budget')
+                response = build_prediction(features, probas, 0, unavailable=len(timed_out))
+                response['timed_out_models'] = timed_out
+                return response
+            # Get predictions from all models, sharing a batch with concurrent callers if enabled
+            if batcher is not None and profile is None:
+                probas, row = batcher.predict(input_data[0], current)
+            else:
+                probas, row = ensemble_probabilities(input_data, current, profile), 0
+            return build_prediction(features, probas, row)
+
+        explain = explain_requested()
+
+        def compute_response():
+            response = compute()
+            if explain:
+                # Only the models that answered, whichever path ran them
+                explanations = explain_rows(input_data, current, list(response['predictions']))
+                response['explanation'] = row_explanation(explanations, 0)
+            return response
+
+        # Repeated inputs are answered from the cache; the model-set version in the key
+        # keeps results of different training runs apart
+        if prediction_cache is not None and profile is None:
+            key = (current.version, cascade, parallel, explain, tuple(input_data[0].tolist()))
+            # Results missing timed-out models are not kept for later requests
+            response = prediction_cache.get_or_compute(
+                key, compute_response, cache_if=lambda value: not value.get('timed_out_models'))
+        else:
+            response = compute_response()
+
+        with stage_timer('serialization'):
+            return encode_response(request, response)
+
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        print(f"Prediction error: {str(e)}")
+        return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+
+@app.route('/predict/batch', methods=['POST'])
+@profiled
+def predict_diabetes_batch():
+    """Predict diabetes risk for many patients in one vectorized pass
+
+    Records can be sent as JSON or MessagePack (a list, {"records": [...]} or
+    {"columns": {feature: [...]}}) or as a raw float matrix, see wire_format.
+    ?format=columnar returns one list per field instead of one object per record.
+    """
+    try:
+        try:
+            data = decode_body(request, len(FEATURES))
+            layout = request.args.get('format', 'records')
+            if layout not in ('records', 'columnar'):
+                raise PayloadError(f'Unknown response format: {layout}')
+
+            rows = None
+            if isinstance(data, np.ndarray):
+                input_data = data
+            elif isinstance(data, dict) and 'columns' in data:
+                input_data = columns_to_matrix(data['columns'], FEATURES)
+            else:
+                # Accept either {"records": [...]} or a bare list of records
+                records = data.get('records') if isinstance(data, dict) else data
+
+                if not records or not isinstance(records, list):
+                    return jsonify({'error': 'No records provided'}), 400
+
+                if len(records) > MAX_BATCH_SIZE:
+                    return jsonify({'error': f'Batch too large: {len(records)} records (max {MAX_BATCH_SIZE})'}), 400
+
+                # Extract features for every record
+                rows = []
+                for index, record in enumerate(records):
+                    if not record or not isinstance(record, dict):
+                        return jsonify({'error': f'Record {index}: No data provided'}), 400
+                    try:
+                        rows.append(parse_features(record))
+                    except FeatureError as e:
+                        return jsonify({'error': f'Record {index}: {str(e)}'}), 400
+
+                input_data = np.array([[row[feature] for feature in FEATURES] for row in rows])
+        except PayloadError as e:
+            return jsonify({'error': str(e)}), e.status
+
+        if len(input_data) == 0:
+            return jsonify({'error': 'No records provided'}), 400
+
+        if len(input_data) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch too large: {len(input_data)} records (max {MAX_BATCH_SIZE})'}), 400
+
+        # One scaler.transform and one predict_proba per model for the whole matrix
+        current = model_set
+        profile = g.get('profile') if PROFILE_TOKEN else None
+        cascade = cascade_requested()
+        if cascade:
+            probas = cascade_probabilities(input_data, current, profile)
+        else:
+            probas = ensemble_probabilities(input_data, current, profile)
+
+        # Explained for every row; rows a cascade settled early leave out the models it skipped
+        explanations = explain_rows(input_data, current, list(probas)) if explain_requested() else None
+
+        if layout == 'columnar':
+            body = columnar_predictions(input_data, probas)
+            if explanations is not None:
+                body['explanations'] = columnar_explanations(explanations, probas)
+            return encode_response(request, body)
+
+        if rows is None:
+            rows = [dict(zip(FEATURES, values)) for values in input_data.tolist()]
+        build = build_cascade_prediction if cascade else build_prediction
+        results = [build(row, probas, i) for i, row in enumerate(rows)]
+        if explanations is not None:
+            for i, result in enumerate(results):
+                result['explanation'] = row_explanation(explanations, i, result['predictions'])
+
+        return encode_response(request, {
+            'count': len(results),
+            'results': results
+        })
+
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        return jsonify({'error': f'Batch prediction failed: {str(e)}'}), 500
+
+# Argument order of heart_disease_model.py's command line
+HEART_FIELDS = ['age', 'sex', 'chestPainType', 'restingBP', 'cholesterol', 'fastingBS', 'restingECG',
+                'maxHR', 'exerciseAngina', 'oldpeak', 'stSlope']
+MENTAL_HEALTH_FIELDS = ['phq9_answers', 'gad7_answers', 'pss_answers', 'who5_answers']
+
+def cli_argument(value):
+    """A JSON value as the string the Node backend passes on the command line (Number.toString)"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+@app.route('/predict/heart', methods=['POST'])
+def predict_heart():
+    """Heart disease risk, same result as running heart_disease_model.py with the request's fields"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or any(data.get(name) is None for name in HEART_FIELDS):
+        return jsonify({'error': heart_disease_model.MISSING_PARAMETERS}), 400
+
+    try:
+        input_data = heart_disease_model.parse_arguments([cli_argument(data[name]) for name in HEART_FIELDS])
+        return jsonify(heart_predictor.predict_heart_disease(input_data))
+    except Exception as e:
+        return jsonify(heart_disease_model.error_result(e)), 400
+
+@app.route('/predict/mental-health', methods=['POST'])
+def predict_mental_health():
+    """Mental health assessment, same result as running mental_health_model.py with the answers"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not all(isinstance(data.get(name), list) for name in MENTAL_HEALTH_FIELDS):
+        args = []
+    else:
+        # Flattened and sliced exactly as the command line is
+        args = [cli_argument(answer) for name in MENTAL_HEALTH_FIELDS for answer in data[name]]
+
+    if len(args) < 31:
+        return jsonify({'error': mental_health_model.MISSING_PARAMETERS}), 400
+
+    try:
+        input_data = mental_health_model.parse_arguments(args)
+        return jsonify(mental_health_predictor.predict_mental_health(input_data))
+    except Exception as e:
+        return jsonify(mental_health_model.error_result(e)), 400
+
+class FeatureError(ValueError):
+    """Raised when a prediction payload is missing a required feature or has an invalid value"""
+
+def parse_features(data):
+    """Extract the model features from a request payload as finite floats.
+
+    Rejects the same values as wire_format.check_finite does for columnar and
+    matrix payloads, so every input format accepts the same rows.
+    """
+    features = {}
+    for feature in FEATURES:
+        if feature not in data:
+            raise FeatureError(f'Missing required feature: {feature}')
+        try:
+            value = float(data[feature])
+        except (TypeError, ValueError):
+            raise FeatureError(f'Invalid value for {feature}: {data[feature]!r} is not a number') from None
+        if not np.isfinite(value):
+            raise FeatureError(f'Invalid value for {feature}: non-finite feature value')
+        features[feature] = value
+    return features
+
+def stage_timer(stage, route=None):
+    """Time one stage of a prediction into PREDICT_STAGE_SECONDS under the route it serves.
+
+    Outside a request and without an explicit route (warmup) nothing is recorded,
+    so the histograms only describe live traffic.
+    """
+    if route is None and has_request_context() and request.url_rule is not None:
+        route = request.url_rule.rule
+    if route is None:
+        return contextlib.nullcontext()
+    return PREDICT_STAGE_SECONDS.time(route=route, stage=stage)
+
+def ensemble_probabilities(input_data, current=None, profile=None, route=None):
+    """Scale a feature matrix once and run predict_proba for every model on it.
+
+    route labels the stage timing when this runs outside a request, as on the
+    micro-batcher's thread.
+    """
+    # Read the live set once so the scaler and models always come from the same training run
+    current = current or model_set
+
+    with stage_timer('scale', route):
+        input_scaled = current.scaler.transform(input_data)
+
+    probas = {}
+    for name, model in current.models.items():
+        start = time.perf_counter()
+        probas[name] = model_predict_proba(model, input_scaled)
+        elapsed = time.perf_counter() - start
+
+        MODEL_INFERENCE_SECONDS.observe(elapsed, model=name)
+        if profile is not None:
+            profile['models_ms'][name] = round(elapsed * 1000, 3)
+    return probas
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when no ensemble member answers within a request's latency budget"""
+
+def prediction_deadline():
+    """perf_counter() deadline for this request's latency budget, or None without one"""
+    budget_ms = request.headers.get('X-Latency-Budget-Ms') or request.args.get('budget_ms')
+    budget_ms = float(budget_ms) if budget_ms is not None else PREDICT_DEADLINE_MS
+    if budget_ms <= 0:
+        return None
+    # The budget covers the whole request, parsing included
+    return g.get('request_start', time.perf_counter()) + budget_ms / 1000
+
+def parallel_probabilities(input_data, current=None, deadline=None, profile=None):
+    """Run every model's predict_proba concurrently and collect those done by the deadline.
+
+    Returns the probabilities of the models that finished, in ensemble order, and
+    the names of the ones that did not. Models that have not started are
+    cancelled; ones already running finish in the background and are discarded.
+    """
+    current = current or model_set
+
+    with stage_timer('scale'):
+        input_scaled = current.scaler.transform(input_data)
+
+    def run(name, model):
+        start = time.perf_counter()
+        proba = model_predict_proba(model, input_scaled)
+        elapsed = time.perf_counter() - start
+        MODEL_INFERENCE_SECONDS.observe(elapsed, model=name)
+        return proba, elapsed
+
+    futures = {name: model_executor.submit(run, name, model) for name, model in current.models.items()}
+    timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+    wait(futures.values(), timeout=timeout)
+
+    probas = {}
+    timed_out = []
+    for name, future in futures.items():
+        if future.done():
+            probas[name], elapsed = future.result()
+            if profile is not None:
+                profile['models_ms'][name] = round(elapsed * 1000, 3)
+        else:
+            future.cancel()
+            timed_out.append(name)
+            MODEL_TIMEOUTS.inc(model=name)
+    return probas, timed_out
+
+def cascade_requested():
+    """Whether this request uses cascade inference (?cascade= overrides CASCADE_ENABLED)"""
+    value = request.args.get('cascade')
+    if value is None:
+        return CASCADE_ENABLED
+    return value.lower() in ('1', 'true', 'yes')
+
+def explain_requested():
+    """Whether this request asks for per-feature explanations (?explain= overrides EXPLANATIONS_ENABLED)"""
+    value = request.args.get('explain')
+    if value is None:
+        return EXPLANATIONS_ENABLED
+    return value.lower() in ('1', 'true', 'yes')
+
+def explain_rows(input_data, current, names):
+    """Per-feature contributions of the named models for every row of a feature matrix"""
+    with stage_timer('explanation'):
+        return current.explainer.explain(current.models, current.scaler.transform(input_data), names)
+
+def row_explanation(explanations, row, names=None):
+    """The explanation block of one row, for the named models (all by default)"""
+    return {
+        name: {
+            'method': explanation['method'],
+            'output': explanation['output'],
+            'base_value': explanation['base_value'],
+            'contributions': dict(zip(FEATURES, explanation['contributions'][row].tolist()))
+        }
+        for name, explanation in explanations.items() if names is None or name in names
+    }
+
+def risk_band(avg_probability):
+    """Index of the risk band (0 low, 1 moderate, 2 high) for an array of averages"""
+    return (avg_probability > MODERATE_RISK_THRESHOLD).astype(int) + (avg_probability > HIGH_RISK_THRESHOLD)
+
+def cascade_order(current):
+    """Model names of a set, cheapest single-row warmup time first"""
+    return sorted(current.models, key=lambda name: warmup_stats.get(name, {}).get('batch_1_ms', float('inf')))
+
+def cascade_probabilities(input_data, current=None, profile=None):
+    """Per-model probabilities, evaluating each model only on rows whose result is still open.
+
+    After each model the ensemble's final average is bounded by assuming every
+    model not yet run answers 0 or 1. A row is settled once both bounds fall in
+    the same risk band and the majority vote is decided either way; later models
+    skip it and its entries stay NaN. The majority vote and risk band of the
+    models that did run then equal those of the full ensemble.
+    """
+    current = current or model_set
+
+    with stage_timer('scale'):
+        input_scaled = current.scaler.transform(input_data)
+
+    names = cascade_order(current)
+    n_models = len(names)
+    total = np.zeros(len(input_scaled))
+    votes = np.zeros(len(input_scaled))
+    pending = np.arange(len(input_scaled))
+
+    probas = {}
+    for evaluated, name in enumerate(names, start=1):
+        proba = np.full((len(input_scaled), 2), np.nan)
+        if len(pending):
+            start = time.perf_counter()
+            proba[pending] = model_predict_proba(current.models[name], input_scaled[pending])
+            elapsed = time.perf_counter() - start
+
+            MODEL_INFERENCE_SECONDS.observe(elapsed, model=name)
+            if profile is not None:
+                profile['models_ms'][name] = round(elapsed * 1000, 3)
+
+            total[pending] += proba[pending, 1]
+            votes[pending] += np.argmax(proba[pending], axis=1)
+
+            remaining = n_models - evaluated
+            low = total[pending] / n_models
+            high = (total[pending] + remaining) / n_models
+            vote_decided = (votes[pending] >= n_models / 2) | (votes[pending] + remaining < n_models / 2)
+            pending = pending[~((risk_band(low) == risk_band(high)) & vote_decided)]
+        probas[name] = proba
+    return probas
+
+def columnar_predictions(input_data, probas):
+    """The fields of build_prediction for every row at once, one list per field.
+
+    Values match build_prediction row for row. Models a cascade skipped for a row
+    have None there. Recommendation lists are sent once per distinct list and
+    referenced by index, and the disclaimer once per response.
+    """
+    names = list(probas)
+    stacked = np.stack([probas[name][:, 1] for name in names])
+    ran = ~np.isnan(stacked)
+    votes = np.stack([probas[name][:, 1] > probas[name][:, 0] for name in names]) & ran
+    n_ran = ran.sum(axis=0)
+
+    # Summed in model order with skipped models as 0, the same sum build_prediction takes
+    avg_probability = np.where(ran, stacked, 0.0).sum(axis=0) / n_ran
+    ensemble_pred = (votes.sum(axis=0) >= n_ran / 2).astype(int)
+    band = risk_band(avg_probability)
+    risk_levels = np.array(['Low Risk', 'Moderate Risk', 'High Risk'])[band]
+
+    agreement = votes.sum(axis=0) / n_ran
+    confidence = np.where((agreement == 0) | (agreement == 1), 95,
+                          np.where((agreement >= 0.75) | (agreement <= 0.25), 85, 75))
+
+    # generate_recommendations depends only on the risk band and four feature thresholds
+    column = {feature: input_data[:, index] for index, feature in enumerate(FEATURES)}
+    codes = (band * 16 + (column['Glucose'] > 140) * 8 + (column['BMI'] > 30) * 4
+             + (column['BloodPressure'] > 90) * 2 + (column['Age'] > 45))
+    unique_codes, first_rows, recommendation_index = np.unique(codes, return_index=True, return_inverse=True)
+    recommendation_sets = [
+        generate_recommendations(dict(zip(FEATURES, input_data[row].tolist())), risk_levels[row])
+        for row in first_rows
+    ]
+
+    def column_values(values, mask):
+        return [value if keep else None for value, keep in zip(values.tolist(), mask.tolist())]
+
+    return {
+        'count': len(input_data),
+        'models': names,
+        'predictions': {name: column_values(votes[i].astype(int), ran[i]) for i, name in enumerate(names)},
+        'probabilities': {
+            name: {
+                'no_diabetes': column_values(probas[name][:, 0], ran[i]),
+                'diabetes': column_values(probas[name][:, 1], ran[i])
             }
+            for i, name in enumerate(names)
+        },
+        'ensemble_prediction': ensemble_pred.tolist(),
+        'risk_level': risk_levels.tolist(),
+        'risk_score': np.round(avg_probability * 100, 1).tolist(),
+        'confidence': confidence.tolist(),
+        'recommendation_sets': recommendation_sets,
+        'recommendations': recommendation_index.tolist(),
+        'disclaimer': DISCLAIMER
+    }
 
-        # Ensemble prediction (majority vote)
-        ensemble_pred = 1 if sum(predictions.values()) >= len(models) / 2 else 0
+def columnar_explanations(explanations, probas):
+    """explain_rows output as one list per model and feature, None where a model did not run"""
+    columns = {}
+    for name, explanation in explanations.items():
+        ran = ~np.isnan(probas[name][:, 1])
+        contributions = explanation['contributions']
+        columns[name] = {
+            'method': explanation['method'],
+            'output': explanation['output'],
+            'base_value': explanation['base_value'],
+            'contributions': {
+                feature: [value if keep else None for value, keep in zip(contributions[:, index].tolist(), ran.tolist())]
+                for index, feature in enumerate(FEATURES)
+            }
+        }
+    return columns
 
-        # Calculate risk level
-        avg_probability = np.mean([prob['diabetes'] for prob in probabilities.values()])
+def build_cascade_prediction(features, probas, row):
+    """build_prediction over the models that ran for a row, listed in models_run"""
+    ran = {name: proba for name, proba in probas.items() if not np.isnan(proba[row, 1])}
+    response = build_prediction(features, ran, row)
+    response['models_run'] = list(ran)
+    return response
 
-        if avg_probability > 0.7:
-            risk_level = 'High Risk'
-        elif avg_probability > 0.4:
-            risk_level = 'Moderate Risk'
+def model_predict_proba(model, input_scaled):
+    """predict_proba whose per-row output does not depend on the batch size"""
+    linear = isinstance(model, LogisticRegression) or (
+        isinstance(model, SGDClassifier) and model.loss in ('log_loss', 'modified_huber'))
+    if linear and len(model.classes_) == 2:
+        # BLAS picks different kernels for one row and for a matrix, which can move
+        # the decision value by an ulp; a row-wise einsum over a C-ordered matrix keeps
+        # every row identical (a Fortran-ordered one is summed in a different order)
+        input_scaled = np.ascontiguousarray(input_scaled, dtype=np.float64)
+        decision = np.einsum('ij,j->i', input_scaled, model.coef_[0]) + model.intercept_[0]
+        if getattr(model, 'loss', 'log_loss') == 'modified_huber':
+            # Same mapping as SGDClassifier.predict_proba for the modified Huber loss
+            prob = (np.clip(decision, -1, 1) + 1) / 2
         else:
-            risk_level = 'Low Risk'
+            prob = expit(decision)
+        return np.column_stack([1 - prob, prob])
+    return model.predict_proba(input_scaled)
 
-        # Generate recommendations
-        recommendations = generate_recommendations(features, risk_level)
+def build_prediction(features, probas, row, unavailable=0):
+    """Build the prediction response for one row of the per-model probability matrices.
 
-        response = {
-            'predictions': predictions,
-            'probabilities': probabilities,
-            'ensemble_prediction': ensemble_pred,
-            'risk_level': risk_level,
-            'risk_score': round(avg_probability * 100, 1),
-            'confidence': calculate_confidence(predictions),
-            'recommendations': recommendations,
-            'disclaimer': 'This assessment is not a medical diagnosis. It is intended for awareness and self-reflection only. Always consult a healthcare professional for medical concerns.'
+    unavailable counts ensemble members missing from probas (timed out); they
+    lower the reported confidence as if they could have voted either way.
+    """
+    predictions = {}
+    probabilities = {}
+
+    for name, proba in probas.items():
+        prob = proba[row]
+
+        # Labels come from the probabilities (classes_ are [0, 1]) so single and batch calls agree
+        predictions[name] = int(np.argmax(prob))
+        probabilities[name] = {
+            'no_diabetes': float(prob[0]),
+            'diabetes': float(prob[1])
         }
 
-        return jsonify(response)
+    # Ensemble prediction (majority vote); a tie counts as diabetes, so a split ensemble
+    # errs toward recommending screening
+    ensemble_pred = 1 if sum(predictions.values()) >= len(predictions) / 2 else 0
+
+    # Calculate risk level
+    avg_probability = np.mean([prob['diabetes'] for prob in probabilities.values()])
+
+    if avg_probability > HIGH_RISK_THRESHOLD:
+        risk_level = 'High Risk'
+    elif avg_probability > MODERATE_RISK_THRESHOLD:
+        risk_level = 'Moderate Risk'
+    else:
+        risk_level = 'Low Risk'
+
+    # Generate recommendations
+    with stage_timer('recommendations'):
+        recommendations = generate_recommendations(features, risk_level)
+
+    return {
+        'predictions': predictions,
+        'probabilities': probabilities,
+        'ensemble_prediction': ensemble_pred,
+        'risk_level': risk_level,
+        'risk_score': round(avg_probability * 100, 1),
+        'confidence': calculate_confidence(predictions, unavailable),
+        'recommendations': recommendations,
+        'disclaimer': DISCLAIMER
+    }
+
+# The batcher only serves /predict, and scores on its own thread outside the request
+batcher = MicroBatcher(
+    functools.partial(ensemble_probabilities, route='/predict'),
+    max_batch_size=MICROBATCH_MAX_BATCH_SIZE,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS
+) if MICROBATCH_ENABLED else None
+
+# Rule-based predictors, built once and shared by every request
+heart_predictor = heart_disease_model.HeartDiseasePredictor()
+mental_health_outcomes = None
+if MENTAL_HEALTH_OUTCOME_TABLE:
+    mental_health_outcomes = mental_health_model.load_outcome_table(MENTAL_HEALTH_OUTCOME_TABLE_PATH)
+    usage = mental_health_outcomes.memory_usage()
+    print(f"Mental health outcome table: {usage['combinations']} combinations, "
+          f"{usage['outcomes']} outcomes, {usage['total_bytes'] / 1e6:.2f} MB")
+mental_health_predictor = mental_health_model.MentalHealthPredictor(mental_health_outcomes)
+
+model_executor = ThreadPoolExecutor(max_workers=PARALLEL_MODEL_WORKERS, thread_name_prefix='model')
+
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL
+) if PREDICTION_CACHE_SIZE > 0 else None
+
+def feedback_base_version(current):
+    """Version of the trained set a ModelSet's online updates were applied to (its own without any)"""
+    return (current.training_stats.get('feedback') or {}).get('base_version', current.version)
+
+def feedback_model_set(base, online, feedback, version):
+    """base with FEEDBACK_MODEL replaced by an OnlineLinearModel's member, as ModelSet version"""
+    models = dict(base.models)
+    models[FEEDBACK_MODEL] = online.model_for(base.scaler)
+    # Reuse the base set's explanation state only if something already built it
+    explainer = (base._explainer.replaced(models, [FEEDBACK_MODEL], version)
+                 if base._explainer is not None else None)
+    return ModelSet(models, base.scaler, version, base.accuracies, base.trained_at,
+                    dict(base.training_stats, feedback=feedback), explainer, online, base.background)
+
+def read_feedback_state(base_version):
+    """The saved {'version', 'online', 'feedback'} of updates to trained set base_version, or None"""
+    try:
+        state = joblib.load(FEEDBACK_STATE_PATH)
+    except FileNotFoundError:
+        return None
+    return state if state['feedback']['base_version'] == base_version else None
+
+def apply_feedback(X, y):
+    """Fold one mini-batch of labeled rows into the live ModelSet and publish the result.
+
+    Only FEEDBACK_MODEL changes; the other models, the serving scaler and their
+    explanations are shared with the previous set. Runs on the feedback thread
+    while /predict keeps reading whichever set is live.
+
+    Workers take turns under a file lock: each update starts from the online
+    state the last one saved, whichever worker made it, and saves its own, so
+    every worker serves the same sequence of versions.
+    """
+    start = time.perf_counter()
+    os.makedirs('models', exist_ok=True)
+    with open(f'{FEEDBACK_STATE_PATH}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        while True:
+            base = model_set
+            base_version = feedback_base_version(base)
+            state = read_feedback_state(base_version)
+            if state is not None:
+                online, feedback = state['online'], dict(state['feedback'])
+            elif base.online is not None:
+                online, feedback = base.online, dict(base.training_stats['feedback'])
+            else:
+                # A set from training or disk: start from its own member and scaler
+                online = OnlineLinearModel(base.models[FEEDBACK_MODEL], base.scaler,
+                                           FEEDBACK_LEARNING_RATE, FEEDBACK_ALPHA)
+                feedback = {'base_version': base_version}
+            online = online.updated(X, y)
+
+            version = uuid.uuid4().hex[:12]
+            feedback.update(online.stats(), model=FEEDBACK_MODEL, updated_at=time.time())
+            new_set = feedback_model_set(base, online, feedback, version)
 
+            # A retrain or load published meanwhile; apply the rows to that set instead
+            if activate_model_set(new_set, replaces=base):
+                break
+
+        # Only the member's online state, a few kilobytes; the rest of the set is already on disk
+        _dump_atomic({'version': version, 'online': online, 'feedback': feedback}, FEEDBACK_STATE_PATH)
+    FEEDBACK_UPDATE_SECONDS.observe(time.perf_counter() - start)
+
+def reload_saved_feedback():
+    """Publish the online update another worker saved, if it applies to the live set"""
+    current = model_set
+    if current is None:
+        return False
+    state = read_feedback_state(feedback_base_version(current))
+    if state is None or state['version'] == current.version:
+        return False
+    new_set = feedback_model_set(current, state['online'], state['feedback'], state['version'])
+    if not activate_model_set(new_set, replaces=current):
+        return False
+    print(f"Loaded feedback update {state['version']} saved by another process")
+    return True
+
+feedback_learner = FeedbackLearner(
+    apply_feedback,
+    max_queue_size=FEEDBACK_QUEUE_SIZE,
+    batch_size=FEEDBACK_BATCH_SIZE,
+    interval_seconds=FEEDBACK_INTERVAL_SECONDS
+) if FEEDBACK_ENABLED else None
+
+@app.route('/stats', methods=['GET'])
+def service_stats():
+    """Runtime statistics for the serving path"""
+    return jsonify({
+        'microbatch': batcher.stats() if batcher is not None else {'enabled': False},
+        'cache': prediction_cache.stats() if prediction_cache is not None else {'enabled': False},
+        'model_store': 'mmap' if MODEL_MMAP else 'heap',
+        'mental_health_outcomes': (mental_health_outcomes.memory_usage() if mental_health_outcomes is not None
+                                   else {'enabled': False}),
+        'feedback': (dict(feedback_learner.stats(), model_version=model_set.version if model_set is not None else None,
+                          online=(model_set.training_stats.get('feedback') if model_set is not None else None))
+                     if feedback_learner is not None else {'enabled': False}),
+        'memory': dict(process_memory(), pid=os.getpid())
+    })
+
+@app.route('/feedback', methods=['POST'])
+def submit_feedback():
+    """Queue labeled outcomes for online learning
+
+    Takes one record, a list of records or {"records": [...]}, each with the
+    /predict features plus "Outcome" (0 or 1). Answers 202 once every record is
+    queued and 429 when the queue has no room for them; progress is in /stats.
+    """
+    if feedback_learner is None:
+        return jsonify({'error': 'Feedback learning is disabled (FEEDBACK_ENABLED=0)'}), 404
+    if model_set is None:
+        return jsonify({'error': 'Models are not loaded yet'}), 503
+
+    try:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            records = data['records'] if 'records' in data else [data]
+        else:
+            records = data
+
+        if not records or not isinstance(records, list):
+            return jsonify({'error': 'No records provided'}), 400
+
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch too large: {len(records)} records (max {MAX_BATCH_SIZE})'}), 400
+
+        rows = []
+        outcomes = []
+        for index, record in enumerate(records):
+            if not record or not isinstance(record, dict):
+                return jsonify({'error': f'Record {index}: No data provided'}), 400
+            try:
+                features = parse_features(record)
+            except FeatureError as e:
+                return jsonify({'error': f'Record {index}: {str(e)}'}), 400
+            row = [features[feature] for feature in FEATURES]
+            outcome = record.get('Outcome')
+            if isinstance(outcome, bool) or outcome not in (0, 1):
+                return jsonify({'error': f'Record {index}: Outcome must be 0 or 1'}), 400
+            rows.append(row)
+            outcomes.append(outcome)
+
+        if not feedback_learner.submit(np.array(rows), outcomes):
+            FEEDBACK_ROWS.inc(len(rows), status='rejected')
+            return (jsonify({'error': 'Feedback queue is full, retry later'}), 429,
+                    {'Retry-After': str(max(1, int(FEEDBACK_INTERVAL_SECONDS)))})
+
+        FEEDBACK_ROWS.inc(len(rows), status='queued')
+        return jsonify({
+            'message': 'Feedback queued',
+            'accepted': len(rows),
+            'queue_depth': feedback_learner.stats()['queue_depth']
+        }), 202
     except Exception as e:
-        print(f"Prediction error: {str(e)}")
-        return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+        return jsonify({'error': f'Feedback failed: {str(e)}'}), 500
 
 def generate_recommendations(features, risk_level):
     """Generate personalized recommendations based on input features and risk level"""
@@ -218,11 +1694,19 @@ def generate_recommendations(features, risk_level):
 
     return recommendations[:4]  # Limit to top 4 recommendations
 
-def calculate_confidence(predictions):
-    """Calculate confidence score based on model agreement"""
+def calculate_confidence(predictions, unavailable=0):
+    """Calculate confidence score based on model agreement
+
+    With unavailable models the score is the lowest any of their votes could give.
+    """
     values = list(predictions.values())
-    agreement = sum(values) / len(values)
+    return min(
+        agreement_confidence((sum(values) + extra) / (len(values) + unavailable))
+        for extra in range(unavailable + 1)
+    )
 
+def agreement_confidence(agreement):
+    """Confidence score for the fraction of models voting diabetes"""
     # If all models agree, high confidence
     if agreement == 0 or agreement == 1:
         return 95
@@ -233,22 +1717,97 @@ def calculate_confidence(predictions):
     else:
         return 75
 
+def training_plan(options):
+    """Trainer callable, mode and source description for a /train request body"""
+    mode = options.get('mode', 'full')
+    if mode == 'full':
+        if 'tune' in options:
+            return functools.partial(train_models, tune=bool(options['tune'])), mode, None
+        return train_models, mode, None
+    if mode != 'incremental':
+        raise ValueError(f'Unknown training mode: {mode}')
+    if options.get('tune'):
+        raise ValueError('Hyperparameter tuning is only available in full mode')
+
+    chunk_size = int(options.get('chunk_size', INCREMENTAL_CHUNK_SIZE))
+    epochs = int(options.get('epochs', INCREMENTAL_EPOCHS))
+    if chunk_size < 1 or epochs < 1:
+        raise ValueError('chunk_size and epochs must be positive')
+
+    if options.get('data_path'):
+        # Only files inside TRAIN_DATA_DIR can be read
+        data_dir = os.path.realpath(TRAIN_DATA_DIR)
+        path = os.path.realpath(os.path.join(data_dir, options['data_path']))
+        if os.path.commonpath([data_dir, path]) != data_dir or not os.path.isfile(path):
+            raise ValueError(f"Training data not found: {options['data_path']}")
+        source = CsvSource(path, chunk_size)
+    else:
+        rows = int(options.get('rows', 1000000))
+        if rows < 1:
+            raise ValueError('rows must be positive')
+        source = SyntheticSource(rows, chunk_size, seed=int(options.get('seed', 42)))
+
+    return functools.partial(train_models_incremental, source, epochs=epochs), mode, source.describe()
+
 @app.route('/train', methods=['POST'])
 def retrain_models():
-    """Retrain models with new parameters (admin endpoint)"""
+    """Retrain models in the background (admin endpoint)
+
+    An optional JSON body {"mode": "incremental", "rows": ..., "chunk_size": ...,
+    "epochs": ..., "data_path": ...} streams a synthetic dataset of that many rows, or
+    a CSV under TRAIN_DATA_DIR, through partial_fit models instead of the full ensemble.
+    {"tune": true} runs a hyperparameter search before a full retrain.
+    """
     try:
-        accuracies = train_models()
+        options = request.get_json(silent=True) or {}
+        try:
+            trainer, mode, source = training_plan(options)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        job, created = start_training_job(trainer, mode, source)
+
+        # ?wait=true keeps the old blocking behaviour for scripts that expect it
+        if request.args.get('wait', 'false').lower() == 'true':
+            job['_future'].result()
+            status = job_status(job)
+            if status['state'] == 'failed':
+                return jsonify({'error': f"Retraining failed: {status['error']}"}), 500
+            return jsonify({
+                'message': 'Models retrained successfully',
+                'accuracies': status['accuracies'],
+                'job': status
+            })
+
         return jsonify({
-            'message': 'Models retrained successfully',
-            'accuracies': accuracies
-        })
+            'message': 'Retraining started' if created else 'Retraining already in progress',
+            'job_id': job['job_id'],
+            'status_url': f"/train/status/{job['job_id']}"
+        }), 202
     except Exception as e:
         return jsonify({'error': f'Retraining failed: {str(e)}'}), 500
 
+@app.route('/train/status', methods=['GET'])
+@app.route('/train/status/<job_id>', methods=['GET'])
+def training_status(job_id=None):
+    """Progress, timings and accuracies of a retraining job (latest job by default)"""
+    with training_lock:
+        if job_id is None:
+            job = next(reversed(training_jobs.values()), None)
+        else:
+            job = training_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Training job not found'}), 404
+
+    return jsonify(job_status(job))
+
 if __name__ == '__main__':
-    # Load or train models on startup
+    # Development server; use gunicorn -c gunicorn.conf.py in production
     load_models()
+    mark_ready(warmup_models())
 
     print("Diabetes Prediction ML Service starting...")
-    print(f"Available models: {list(models.keys())}")
-    app.run(host='0.0.0.0', port=5002, debug=True)
+    print(f"Available models: {list(model_set.models.keys())}")
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5002)),
+            debug=os.environ.get('FLASK_DEBUG', '0') == '1', threaded=True)
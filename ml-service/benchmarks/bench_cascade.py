@@ -0,0 +1,109 @@
+"""Compare cascade inference with running the full ensemble on every request.
+
+Replays create_sample_data() rows (the distribution the models were trained on) as
+single-row /predict calls through Flask's test client, with the prediction cache
+off, once with ?cascade=false and once with ?cascade=true. It reports latency, the
+average number of models evaluated, and whether every vote and risk band matched.
+It also times a vectorized /predict/batch-style pass over the same rows.
+
+    python benchmarks/bench_cascade.py
+    python benchmarks/bench_cascade.py --requests 2000 --json cascade.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as service  # noqa: E402
+
+
+def replay(client, records, cascade):
+    latencies = []
+    responses = []
+    for record in records:
+        start = time.perf_counter()
+        response = client.post(f'/predict?cascade={str(cascade).lower()}', json=record)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        responses.append(response.get_json())
+    return np.asarray(latencies) * 1000, responses
+
+
+def bench_batch(rows, repeats=5):
+    """Best-of-repeats wall time of the full and cascaded probability passes"""
+    timings = {}
+    for name, score in (('full', service.ensemble_probabilities), ('cascade', service.cascade_probabilities)):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            score(rows)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='single-row /predict calls per mode')
+    parser.add_argument('--batch-rows', type=int, default=10000)
+    parser.add_argument('--workdir', help='directory with models/ (default: train into a temporary directory)')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix='ml-service-cascade-'))
+    service.prediction_cache = None
+    service.load_models()
+    service.mark_ready(service.warmup_models())
+    print(f"Cascade order: {service.cascade_order(service.model_set)}")
+
+    client = service.app.test_client()
+    records = service.create_sample_data(n_samples=args.requests, seed=7)[service.FEATURES].to_dict('records')
+    replay(client, records[:20], False)
+    replay(client, records[:20], True)
+
+    full_ms, full = replay(client, records, False)
+    cascade_ms, cascaded = replay(client, records, True)
+
+    models_run = [len(response['models_run']) for response in cascaded]
+    mismatches = sum(
+        a['ensemble_prediction'] != b['ensemble_prediction'] or a['risk_level'] != b['risk_level']
+        for a, b in zip(full, cascaded)
+    )
+    skipped = {name: sum(name not in response['models_run'] for response in cascaded) / len(cascaded)
+               for name in service.model_set.models}
+
+    batch_rows = service.create_sample_data(n_samples=args.batch_rows, seed=11)[service.FEATURES].values
+    batch_ms = bench_batch(batch_rows)
+
+    results = {
+        'requests': len(records),
+        'models_in_ensemble': len(service.model_set.models),
+        'avg_models_evaluated': round(float(np.mean(models_run)), 3),
+        'skip_rate_per_model': {name: round(rate, 4) for name, rate in skipped.items()},
+        'vote_or_band_mismatches': mismatches,
+        'full_p50_ms': round(float(np.percentile(full_ms, 50)), 4),
+        'full_p99_ms': round(float(np.percentile(full_ms, 99)), 4),
+        'cascade_p50_ms': round(float(np.percentile(cascade_ms, 50)), 4),
+        'cascade_p99_ms': round(float(np.percentile(cascade_ms, 99)), 4),
+        'latency_saved_mean': round(1 - cascade_ms.mean() / full_ms.mean(), 4),
+        'batch_rows': len(batch_rows),
+        'batch_full_ms': round(batch_ms['full'], 3),
+        'batch_cascade_ms': round(batch_ms['cascade'], 3)
+    }
+
+    for key, value in results.items():
+        print(f'{key:<28} {value}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
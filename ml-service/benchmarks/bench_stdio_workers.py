@@ -0,0 +1,162 @@
+"""Compare spawning a model script per prediction with long-lived --serve-stdio workers.
+
+For each of diabetes_model.py, heart_disease_model.py and mental_health_model.py
+this runs the same sample requests three ways, the way the Node backend could
+call them:
+
+    spawn       one interpreter per request, arguments on the command line
+    persistent  one --serve-stdio worker, one request in flight at a time
+    pool        --workers --serve-stdio workers with requests pipelined over them
+
+It reports requests per second and per-request latency, and checks that every
+mode returns the same results.
+
+    python benchmarks/bench_stdio_workers.py
+    python benchmarks/bench_stdio_workers.py --requests 200 --workers 4 --json stdio.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def diabetes_args(rng):
+    return [rng.randint(0, 12), rng.uniform(70, 200), rng.uniform(50, 110), rng.uniform(5, 45),
+            rng.uniform(10, 300), rng.uniform(18, 45), rng.uniform(0.08, 2.4), rng.randint(21, 80)]
+
+
+def heart_args(rng):
+    return [rng.randint(29, 77), rng.randint(0, 1), rng.randint(0, 3), rng.randint(90, 200),
+            rng.randint(126, 564), rng.randint(0, 1), rng.randint(0, 2), rng.randint(70, 202),
+            rng.randint(0, 1), round(rng.uniform(0, 6.2), 1), rng.randint(0, 2)]
+
+
+def mental_health_args(rng):
+    return ([rng.randint(0, 3) for _ in range(16)] + [rng.randint(0, 4) for _ in range(10)]
+            + [rng.randint(0, 5) for _ in range(5)])
+
+
+SCRIPTS = {
+    'diabetes_model.py': diabetes_args,
+    'heart_disease_model.py': heart_args,
+    'mental_health_model.py': mental_health_args
+}
+
+
+def run_spawn(script, requests):
+    results = []
+    latencies = []
+    for args in requests:
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, script, *args], capture_output=True, text=True).stdout
+        latencies.append(time.perf_counter() - start)
+        results.append(json.loads(output))
+    return results, latencies
+
+
+def start_worker(script, warmup_args):
+    """Start a --serve-stdio worker and wait until it has answered one request"""
+    worker = subprocess.Popen([sys.executable, script, '--serve-stdio'], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True, bufsize=1)
+    worker.stdin.write(json.dumps({'id': 'warmup', 'args': warmup_args}) + '\n')
+    worker.stdout.readline()
+    return worker
+
+
+def stop_worker(worker):
+    worker.stdin.close()
+    worker.wait()
+
+
+def run_persistent(script, requests):
+    worker = start_worker(script, requests[0])
+    results = []
+    latencies = []
+    try:
+        for request_id, args in enumerate(requests):
+            start = time.perf_counter()
+            worker.stdin.write(json.dumps({'id': request_id, 'args': args}) + '\n')
+            reply = json.loads(worker.stdout.readline())
+            latencies.append(time.perf_counter() - start)
+            assert reply['id'] == request_id
+            results.append(reply['result'])
+    finally:
+        stop_worker(worker)
+    return results, latencies
+
+
+def run_pool(script, requests, workers, depth=16):
+    """Round-robin the requests over the workers, up to depth in flight per worker, matching replies by id"""
+    pool = [start_worker(script, requests[0]) for _ in range(workers)]
+    results = [None] * len(requests)
+    window = workers * depth
+    try:
+        start = time.perf_counter()
+        # Bounded windows so neither side blocks on a full pipe
+        for offset in range(0, len(requests), window):
+            batch = range(offset, min(offset + window, len(requests)))
+            for request_id in batch:
+                pool[request_id % workers].stdin.write(json.dumps({'id': request_id, 'args': requests[request_id]}) + '\n')
+            for request_id in batch:
+                reply = json.loads(pool[request_id % workers].stdout.readline())
+                results[reply['id']] = reply['result']
+        elapsed = time.perf_counter() - start
+    finally:
+        for worker in pool:
+            stop_worker(worker)
+    return results, elapsed
+
+
+def summarize(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'requests_per_second': round(len(latencies) / (latencies.sum() / 1000), 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='requests per script and mode')
+    parser.add_argument('--workers', type=int, default=4, help='workers in the pool mode')
+    parser.add_argument('--scripts-dir', default=SERVICE_DIR, help='directory holding the model scripts')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    report = {}
+    print(f"{'script':<24} {'mode':<11} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, make_args in SCRIPTS.items():
+        script = os.path.join(args.scripts_dir, name)
+        rng = random.Random(42)
+        requests = [[str(value) for value in make_args(rng)] for _ in range(args.requests)]
+
+        spawn_results, spawn_latencies = run_spawn(script, requests)
+        persistent_results, persistent_latencies = run_persistent(script, requests)
+        pool_results, pool_seconds = run_pool(script, requests, args.workers)
+        if not spawn_results == persistent_results == pool_results:
+            raise SystemExit(f'{name}: results differ between modes')
+
+        report[name] = {
+            'spawn': summarize(spawn_latencies),
+            'persistent': summarize(persistent_latencies),
+            'pool': {'workers': args.workers, 'requests_per_second': round(len(requests) / pool_seconds, 1)}
+        }
+        for mode, stats in report[name].items():
+            print(f"{name:<24} {mode:<11} {stats['requests_per_second']:>10} "
+                  f"{stats.get('p50_ms', ''):>9} {stats.get('p99_ms', ''):>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
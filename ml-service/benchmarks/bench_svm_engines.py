@@ -0,0 +1,91 @@
+"""Compare the engines available for the ensemble's svm slot.
+
+For each training size, fits every engine on the same standardized split of
+create_sample_data() and reports holdout accuracy, fit time, single-row
+predict_proba latency and batch throughput.
+
+    python benchmarks/bench_svm_engines.py
+    python benchmarks/bench_svm_engines.py --sizes 1000 10000 50000 --json svm.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import FEATURES, build_svm, create_sample_data  # noqa: E402
+
+ENGINES = ['svc', 'nystroem', 'rff']
+
+
+def bench_engine(engine, X_train, y_train, X_test, y_test, latency_rows=200):
+    model = build_svm(engine)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+
+    # Single-row latency, as seen by one /predict call
+    rows = X_test[:latency_rows]
+    model.predict_proba(rows[:1])
+    latencies = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict_proba(X_test)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'engine': engine,
+        'accuracy': round(accuracy, 4),
+        'fit_seconds': round(fit_seconds, 4),
+        'row_latency_us_p50': round(float(np.percentile(latencies, 50)) * 1e6, 1),
+        'row_latency_us_p99': round(float(np.percentile(latencies, 99)) * 1e6, 1),
+        'batch_rows_per_second': round(len(X_test) / batch_seconds),
+        'support_vectors': int(model.support_vectors_.shape[0]) if engine == 'svc' else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rows':>8} {'engine':>9} {'accuracy':>9} {'fit s':>8} {'p50 us':>8} {'p99 us':>8} {'rows/s':>10}")
+    for size in args.sizes:
+        df = create_sample_data(n_samples=size)
+        X_train, X_test, y_train, y_test = train_test_split(
+            df[FEATURES].values, df['Outcome'].values, test_size=0.2, random_state=42
+        )
+        scaler = StandardScaler().fit(X_train)
+        X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+
+        for engine in args.engines:
+            result = dict(bench_engine(engine, X_train, y_train, X_test, y_test), rows=size)
+            results.append(result)
+            print(f"{size:>8} {engine:>9} {result['accuracy']:>9.4f} {result['fit_seconds']:>8.3f} "
+                  f"{result['row_latency_us_p50']:>8.1f} {result['row_latency_us_p99']:>8.1f} "
+                  f"{result['batch_rows_per_second']:>10}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
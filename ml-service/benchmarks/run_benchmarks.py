@@ -0,0 +1,246 @@
+"""Reproducible performance benchmarks for the diabetes ML service.
+
+Covers load_models() cold and warm, train_models() end-to-end and per model,
+single-row /predict through Flask's test client, and raw ensemble inference at
+several batch sizes. Results are written as JSON together with environment
+metadata; --compare checks them against a stored baseline and exits non-zero on
+regressions.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+import numpy as np  # noqa: E402
+
+import app as service  # noqa: E402
+
+BATCH_SIZES = [1, 32, 1000, 100000]
+
+# Environment knobs that change what is being measured
+SERVICE_SETTINGS = ['SVM_ENGINE', 'SVM_COMPONENTS', 'MODEL_MMAP', 'TRAIN_WORKERS', 'TRAIN_RF_JOBS',
+                    'MICROBATCH_ENABLED', 'PREDICTION_CACHE_SIZE', 'OMP_NUM_THREADS']
+
+
+def metric(value, unit, better='lower', **extra):
+    return dict(value=round(value, 6), unit=unit, better=better, **extra)
+
+
+def summarize(samples, unit_scale=1000.0):
+    """Median, p99 and mean of timing samples (seconds), scaled to milliseconds"""
+    samples = np.asarray(samples) * unit_scale
+    return {
+        'p50': round(float(np.percentile(samples, 50)), 4),
+        'p99': round(float(np.percentile(samples, 99)), 4),
+        'mean': round(float(samples.mean()), 4)
+    }
+
+
+def environment():
+    import flask
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SERVICE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'scikit_learn': sklearn.__version__,
+        'flask': flask.__version__,
+        'settings': {name: os.environ[name] for name in SERVICE_SETTINGS if name in os.environ}
+    }
+
+
+def bench_load_cold(repeats):
+    """load_models() in a fresh interpreter each time, timed inside the child"""
+    code = ('import sys, time, json; sys.path.insert(0, %r); import app; '
+            'start = time.perf_counter(); app.load_models(); '
+            'print(json.dumps(time.perf_counter() - start))' % SERVICE_DIR)
+    samples = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True,
+                                text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    stats = summarize(samples)
+    return metric(stats['p50'], 'ms', **stats)
+
+
+def bench_load_warm(repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        service.load_models()
+        samples.append(time.perf_counter() - start)
+    stats = summarize(samples)
+    return metric(stats['p50'], 'ms', **stats)
+
+
+def bench_train(repeats):
+    results = {}
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        new_set = service.train_models()
+        runs.append((time.perf_counter() - start, new_set.training_stats['models']))
+    service.activate_model_set(new_set)
+
+    stats = summarize([total for total, _ in runs], unit_scale=1.0)
+    results['train.end_to_end'] = metric(stats['p50'], 's', **stats)
+    for name in runs[0][1]:
+        wall = [per_model[name]['wall_seconds'] for _, per_model in runs]
+        cpu = [per_model[name]['cpu_seconds'] for _, per_model in runs]
+        results[f'train.{name}'] = metric(float(np.median(wall)), 's', cpu_seconds=float(np.median(cpu)),
+                                          accuracy=runs[-1][1][name]['accuracy'])
+    return results
+
+
+def bench_predict_single(requests):
+    """Single-row /predict through the Flask test client, cache disabled"""
+    cache, service.prediction_cache = service.prediction_cache, None
+    try:
+        client = service.app.test_client()
+        records = service.create_sample_data(n_samples=requests, seed=7)[service.FEATURES].to_dict('records')
+        for record in records[:20]:
+            client.post('/predict', json=record)
+
+        samples = []
+        for record in records:
+            start = time.perf_counter()
+            response = client.post('/predict', json=record)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.get_data(as_text=True)
+    finally:
+        service.prediction_cache = cache
+
+    stats = summarize(samples)
+    return metric(stats['p50'], 'ms', requests_per_second=round(len(samples) / sum(samples), 1), **stats)
+
+
+def bench_ensemble(batch_sizes, repeats):
+    """Raw scaler.transform + predict_proba per model, without Flask"""
+    results = {}
+    current = service.model_set
+    rng = np.random.default_rng(0)
+    pool = service.create_sample_data(n_samples=max(batch_sizes), seed=11)[service.FEATURES].values
+
+    for batch_size in batch_sizes:
+        X = pool[rng.choice(len(pool), batch_size, replace=False)]
+        runs = max(1, repeats if batch_size <= 1000 else repeats // 10)
+        totals = []
+        per_model = {name: [] for name in current.models}
+        for _ in range(runs):
+            start = time.perf_counter()
+            scaled = current.scaler.transform(X)
+            for name, model in current.models.items():
+                model_start = time.perf_counter()
+                service.model_predict_proba(model, scaled)
+                per_model[name].append(time.perf_counter() - model_start)
+            totals.append(time.perf_counter() - start)
+
+        stats = summarize(totals)
+        results[f'ensemble.batch_{batch_size}'] = metric(
+            stats['p50'], 'ms', rows_per_second=round(batch_size / np.median(totals)),
+            models_ms={name: round(float(np.median(times)) * 1000, 4) for name, times in per_model.items()},
+            **stats
+        )
+    return results
+
+
+def run(args):
+    results = {}
+
+    print('load_models() cold...')
+    results['load_models.cold'] = bench_load_cold(args.load_repeats)
+    print('load_models() warm...')
+    results['load_models.warm'] = bench_load_warm(args.load_repeats)
+
+    print('train_models()...')
+    results.update(bench_train(args.train_repeats))
+
+    service.mark_ready(service.warmup_models())
+
+    print('/predict single row...')
+    results['predict.single_row'] = bench_predict_single(args.requests)
+
+    print('ensemble inference...')
+    results.update(bench_ensemble(args.batch_sizes, args.repeats))
+
+    return {'environment': environment(), 'results': results}
+
+
+def compare(current, baseline, threshold):
+    """Names of metrics that got worse than the baseline by more than threshold"""
+    regressions = []
+    print(f"\n{'metric':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base['value']:
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        worse = change > threshold if result['better'] == 'lower' else change < -threshold
+        flag = '  REGRESSION' if worse else ''
+        print(f"{name:<32} {base['value']:>12.4f} {result['value']:>12.4f} {change:>+8.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the JSON results')
+    parser.add_argument('--compare', metavar='BASELINE', help='baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed relative slowdown (default 0.10)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--repeats', type=int, default=50, help='repeats per ensemble batch size')
+    parser.add_argument('--requests', type=int, default=500, help='single-row /predict requests')
+    parser.add_argument('--load-repeats', type=int, default=5)
+    parser.add_argument('--train-repeats', type=int, default=3)
+    parser.add_argument('--workdir', help='directory for models/ (default: a fresh temporary directory)')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    # The service reads and writes models/ relative to the working directory
+    workdir = args.workdir or tempfile.mkdtemp(prefix='ml-service-bench-')
+    os.chdir(workdir)
+    if not os.path.exists('models/diabetes_models.pkl'):
+        service.activate_model_set(service.train_models())
+
+    report = run(args)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {output}')
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print('\nNo regressions.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""Score a whole CSV or Parquet export with the diabetes or heart disease predictor.
+
+The input is read in chunks of --chunk-size rows and every chunk is parsed and
+scored with the predictor's vectorized batch method on a pool of worker processes
+(one per core by default). Results are written to a CSV in input order, so memory
+depends on the chunk size and the number of workers, not on the size of the file.
+Scores are identical to running the model script once per row.
+
+After every chunk the output is flushed and a checkpoint (<output>.checkpoint)
+records how many rows and bytes are done. Running the same command again after
+an interruption truncates the output to the checkpoint and carries on from
+there; --restart starts over.
+
+    python bulk_score.py diabetes patients.csv scores.csv
+    python bulk_score.py heart cohort.parquet scores.csv --id-column patient_id --workers 8
+
+CSV input must hold one record per line (no quoted line breaks). Parquet input
+needs pyarrow (pip install pyarrow).
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from diabetes_model import DiabetesPredictor
+from heart_disease_model import HeartDiseasePredictor
+
+try:
+    import pyarrow.parquet as parquet
+except ImportError:  # optional: only needed for Parquet input
+    parquet = None
+
+PREDICTORS = {
+    'diabetes': (DiabetesPredictor, 'predict_diabetes_batch'),
+    'heart': (HeartDiseasePredictor, 'predict_heart_disease_batch')
+}
+
+RESULT_COLUMNS = ['prediction', 'probability', 'risk', 'total_risk_score']
+
+CHECKPOINT_VERSION = 1
+
+# Batch method and input columns of this worker process, set once by init_worker
+_worker = None
+
+
+def init_worker(model, id_column):
+    global _worker
+    predictor_class, method = PREDICTORS[model]
+    _worker = (getattr(predictor_class(), method), predictor_class.FEATURES, id_column)
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def score_chunk(chunk, first_row):
+    """CSV lines (no header) with the results for one chunk, in row order.
+
+    chunk is a DataFrame or the raw bytes of a CSV header line plus rows. CSV is
+    parsed with float_precision='round_trip' so every value is the float() the
+    model script would see; the default parser can be an ulp off. Formatting the
+    results costs more than scoring them, so that happens here too; csv.writer
+    over Python lists is faster than DataFrame.to_csv and writes the same
+    shortest round-trip repr of every float.
+    """
+    predict, features, id_column = _worker
+    if isinstance(chunk, bytes):
+        chunk = pd.read_csv(io.BytesIO(chunk), usecols=features + ([id_column] if id_column else []),
+                            float_precision='round_trip')
+    try:
+        matrix = chunk[features].to_numpy(dtype=np.float64)
+    except (KeyError, ValueError) as e:
+        raise ValueError(f'Rows {first_row:,} to {first_row + len(chunk) - 1:,}: {e}')
+
+    result = predict(matrix)
+    columns = [
+        result['prediction'].tolist(),
+        result['probability'].tolist(),
+        result['risk'].tolist(),
+        result['risk_factors']['total_risk_score'].tolist()
+    ]
+    if id_column:
+        columns.insert(0, chunk[id_column].tolist())
+    return csv_lines(zip(*columns))
+
+
+def read_chunks(path, columns, chunk_size, skip_rows):
+    """(chunk, rows) pairs of up to chunk_size rows, after the first skip_rows rows"""
+    if path.endswith('.parquet'):
+        if parquet is None:
+            raise SystemExit('Parquet input needs pyarrow (pip install pyarrow)')
+        # Parquet has no cheap row offset, so skipped batches are read and dropped
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            frame = batch.to_pandas()
+            if skip_rows >= len(frame):
+                skip_rows -= len(frame)
+                continue
+            frame = frame.iloc[skip_rows:]
+            skip_rows = 0
+            yield frame, len(frame)
+        return
+
+    # The reader only splits lines; parsing happens in the workers
+    with open(path, 'rb') as f:
+        header = f.readline()
+        for _ in itertools.islice(f, skip_rows):
+            pass
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            yield header + b''.join(lines), len(lines)
+
+
+def count_rows(path):
+    """Rows in a Parquet file from its metadata; None for CSV, which would need a full pass"""
+    if path.endswith('.parquet') and parquet is not None:
+        return parquet.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def load_checkpoint(path, settings):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('settings') != settings:
+        raise SystemExit(f'{path} was written for a different run; use --restart to start over')
+    return checkpoint
+
+
+def save_checkpoint(path, settings, rows, output_bytes):
+    """Write the checkpoint atomically so an interruption never leaves half of one"""
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({'settings': settings, 'rows': rows, 'output_bytes': output_bytes}, f)
+    os.replace(temporary, path)
+
+
+def report(rows, total_rows, started, resumed_rows):
+    elapsed = time.perf_counter() - started
+    rate = (rows - resumed_rows) / elapsed if elapsed > 0 else 0.0
+    line = f'{rows:,} rows'
+    if total_rows:
+        line += f' of {total_rows:,} ({rows / total_rows:.1%})'
+        if rate > 0:
+            line += f', {(total_rows - rows) / rate:.0f}s left'
+    print(f'{line}, {rate:,.0f} rows/s', file=sys.stderr, flush=True)
+
+
+def run(args):
+    features = PREDICTORS[args.model][0].FEATURES
+    checkpoint_path = args.output + '.checkpoint'
+    settings = {
+        'version': CHECKPOINT_VERSION,
+        'model': args.model,
+        'input': os.path.abspath(args.input),
+        'id_column': args.id_column
+    }
+
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path, settings)
+    rows = checkpoint['rows'] if checkpoint else 0
+    output = open(args.output, 'r+b' if checkpoint else 'wb')
+    if checkpoint:
+        # Drop anything written after the last checkpoint
+        output.truncate(checkpoint['output_bytes'])
+        output.seek(checkpoint['output_bytes'])
+        print(f'Resuming after {rows:,} rows', file=sys.stderr)
+    else:
+        output.write(csv_lines([([args.id_column] if args.id_column else []) + RESULT_COLUMNS]))
+
+    total_rows = count_rows(args.input)
+    started = time.perf_counter()
+    resumed_rows = rows
+    submitted = rows
+    pending = deque()
+
+    def write_oldest():
+        nonlocal rows
+        future, size = pending.popleft()
+        try:
+            output.write(future.result())
+        except ValueError as e:
+            raise SystemExit(str(e))
+        output.flush()
+        os.fsync(output.fileno())
+        rows += size
+        save_checkpoint(checkpoint_path, settings, rows, output.tell())
+        if not args.quiet:
+            report(rows, total_rows, started, resumed_rows)
+
+    columns = features + ([args.id_column] if args.id_column else [])
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                 initargs=(args.model, args.id_column)) as pool:
+            for chunk, size in read_chunks(args.input, columns, args.chunk_size, rows):
+                pending.append((pool.submit(score_chunk, chunk, submitted), size))
+                submitted += size
+                # A bounded window of chunks in flight keeps memory flat and output in order
+                while len(pending) >= args.workers * 2:
+                    write_oldest()
+            while pending:
+                write_oldest()
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - started
+    print(f'Scored {rows - resumed_rows:,} rows in {elapsed:.1f}s '
+          f'({(rows - resumed_rows) / max(elapsed, 1e-9):,.0f} rows/s); {rows:,} rows in {args.output}',
+          file=sys.stderr)
+    os.remove(checkpoint_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('model', choices=sorted(PREDICTORS))
+    parser.add_argument('input', help='CSV or .parquet file with the predictor\'s FEATURES columns')
+    parser.add_argument('output', help='CSV file to write the results to')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='scoring processes')
+    parser.add_argument('--id-column', help='input column copied to the first column of the output')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    parser.add_argument('--quiet', action='store_true', help='no per-chunk progress lines')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
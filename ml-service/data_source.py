@@ -0,0 +1,79 @@
+"""Diabetes training data, in memory or as a stream of fixed-size chunks.
+
+The chunked sources can be iterated several times (one pass per iteration) and
+never hold more than one chunk, so memory depends on the chunk size and not on
+the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+FEATURES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age']
+
+
+def generate_features(n_samples, random):
+    """Sample features similar to the Pima Indians Diabetes dataset.
+
+    ``random`` is ``np.random`` itself or a ``np.random.RandomState``.
+    """
+    data = {
+        'Pregnancies': random.randint(0, 17, n_samples),
+        'Glucose': random.normal(120, 30, n_samples).clip(0, 200),
+        'BloodPressure': random.normal(70, 15, n_samples).clip(0, 122),
+        'SkinThickness': random.normal(20, 15, n_samples).clip(0, 99),
+        'Insulin': random.normal(80, 115, n_samples).clip(0, 846),
+        'BMI': random.normal(32, 8, n_samples).clip(0, 67),
+        'DiabetesPedigreeFunction': random.exponential(0.5, n_samples).clip(0.078, 2.42),
+        'Age': random.normal(33, 12, n_samples).clip(21, 81)
+    }
+    return pd.DataFrame(data)
+
+
+def add_outcome(df):
+    """Label rows from their risk factors"""
+    risk_score = (
+        (df['Glucose'] > 140).astype(int) * 0.25 +
+        (df['BMI'] > 30).astype(int) * 0.2 +
+        (df['Age'] > 45).astype(int) * 0.2 +
+        (df['BloodPressure'] > 90).astype(int) * 0.15 +
+        (df['Pregnancies'] > 5).astype(int) * 0.1 +
+        (df['Insulin'] > 150).astype(int) * 0.1
+    )
+
+    df['Outcome'] = (risk_score > 0.4).astype(int)
+    return df
+
+
+class SyntheticSource:
+    """n_rows of synthetic data in chunks of chunk_size, identical on every pass"""
+
+    def __init__(self, n_rows, chunk_size=100000, seed=42):
+        self.n_rows = int(n_rows)
+        self.chunk_size = int(chunk_size)
+        self.seed = seed
+
+    def __iter__(self):
+        for index, start in enumerate(range(0, self.n_rows, self.chunk_size)):
+            random = np.random.RandomState((self.seed + index) % 2 ** 32)
+            yield add_outcome(generate_features(min(self.chunk_size, self.n_rows - start), random))
+
+    def __len__(self):
+        return -(-self.n_rows // self.chunk_size)
+
+    def describe(self):
+        return {'source': 'synthetic', 'rows': self.n_rows, 'chunk_size': self.chunk_size, 'seed': self.seed}
+
+
+class CsvSource:
+    """A CSV file with FEATURES and Outcome columns, read chunk_size rows at a time"""
+
+    def __init__(self, path, chunk_size=100000):
+        self.path = path
+        self.chunk_size = int(chunk_size)
+
+    def __iter__(self):
+        reader = pd.read_csv(self.path, usecols=FEATURES + ['Outcome'], chunksize=self.chunk_size)
+        with reader:
+            yield from reader
+
+    def describe(self):
+        return {'source': 'csv', 'path': self.path, 'chunk_size': self.chunk_size}
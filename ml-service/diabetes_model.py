@@ -81,6 +81,86 @@ class DiabetesPredictor:
             }
         }
 
+    # Column order of the array accepted by predict_diabetes_batch (the command line order)
+    FEATURES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI',
+                'DiabetesPedigreeFunction', 'Age']
+
+    def predict_diabetes_batch(self, data, recommendations=False):
+        """Score N rows at once with array operations, bitwise-identical to predict_diabetes.
+
+        data is an (N, 8) array in FEATURES order or a DataFrame with those columns.
+        Returns a dict of length-N arrays; risk_factors holds every sub-score. With
+        recommendations=True it also returns each row's recommendation list, computed
+        once per distinct combination of the inputs they depend on.
+        """
+        # Imported here so the one-shot command line does not pay for NumPy
+        import numpy as np
+
+        if hasattr(data, 'columns'):
+            data = data[self.FEATURES].to_numpy(dtype=np.float64)
+        data = np.asarray(data, dtype=np.float64).reshape(-1, len(self.FEATURES))
+        column = dict(zip(self.FEATURES, data.T))
+
+        # Same expressions and order of additions as the scalar path; np.clip(x, 0, 1)
+        # is min(max(x, 0), 1) element-wise
+        glucose_score = np.clip((column['Glucose'] - 70) / (200 - 70), 0, 1)
+        bmi_score = np.clip((column['BMI'] - 18.5) / (40 - 18.5), 0, 1)
+        age_score = np.clip((column['Age'] - 20) / (80 - 20), 0, 1)
+        bp_score = np.clip((column['BloodPressure'] - 60) / (120 - 60), 0, 1)
+        preg_score = np.minimum(column['Pregnancies'] / 10, 1)
+        insulin_score = np.clip((column['Insulin'] - 15) / (300 - 15), 0, 1)
+        skin_score = np.clip((column['SkinThickness'] - 7) / (50 - 7), 0, 1)
+        pedigree_score = np.minimum(column['DiabetesPedigreeFunction'], 1)
+
+        risk_score = np.zeros(len(data))
+        risk_score += glucose_score * self.risk_weights['glucose']
+        risk_score += bmi_score * self.risk_weights['bmi']
+        risk_score += age_score * self.risk_weights['age']
+        risk_score += bp_score * self.risk_weights['bloodPressure']
+        risk_score += preg_score * self.risk_weights['pregnancies']
+        risk_score += insulin_score * self.risk_weights['insulin']
+        risk_score += skin_score * self.risk_weights['skinThickness']
+        risk_score += pedigree_score * self.risk_weights['diabetesPedigreeFunction']
+
+        # NumPy's power may use SIMD kernels that differ from libm's pow by an ulp, so
+        # the power itself goes through Python floats like the scalar path
+        exponent = -(risk_score - 0.5) * 5
+        probability = 1 / (1 + np.array([2.71828 ** value for value in exponent.tolist()]))
+
+        # The scalar path's comparisons as written, so NaN lands in the same band
+        band = np.where(probability < 0.3, 0, np.where(probability < 0.7, 1, 2))
+        risk = np.array(['Low', 'Moderate', 'High'])[band]
+
+        result = {
+            'prediction': (probability > 0.5).astype(int),
+            'probability': probability,
+            'risk': risk,
+            'confidence': probability,
+            'risk_factors': {
+                'glucose_score': glucose_score,
+                'bmi_score': bmi_score,
+                'age_score': age_score,
+                'bp_score': bp_score,
+                'pregnancies_score': preg_score,
+                'insulin_score': insulin_score,
+                'skin_thickness_score': skin_score,
+                'pedigree_score': pedigree_score,
+                'total_risk_score': risk_score
+            }
+        }
+
+        if recommendations:
+            # generate_recommendations only looks at BMI, Glucose and Age bands and the risk level
+            bmi_band = (column['BMI'] > 25).astype(int) + (column['BMI'] > 30)
+            glucose_band = (column['Glucose'] > 100).astype(int) + (column['Glucose'] > 140)
+            codes = ((bmi_band * 3 + glucose_band) * 2 + (column['Age'] > 45)) * 3 + band
+            _, first_rows, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            lists = [self.generate_recommendations(dict(zip(self.FEATURES, data[row].tolist())), str(risk[row]))
+                     for row in first_rows]
+            result['recommendations'] = [lists[index] for index in inverse.tolist()]
+
+        return result
+
     def generate_recommendations(self, input_data, risk_level):
         """Generate personalized recommendations based on input data and risk level"""
         recommendations = []
@@ -127,30 +207,76 @@ class DiabetesPredictor:
 
         return recommendations[:5]  # Return top 5 recommendations
 
+MISSING_PARAMETERS = 'Missing input parameters. Required: pregnancies, glucose, bloodPressure, skinThickness, insulin, bmi, diabetesPedigreeFunction, age'
+
+def parse_arguments(args):
+    """Input data from the command line arguments (without the script name)"""
+    return {
+        'Pregnancies': float(args[0]),
+        'Glucose': float(args[1]),
+        'BloodPressure': float(args[2]),
+        'SkinThickness': float(args[3]),
+        'Insulin': float(args[4]),
+        'BMI': float(args[5]),
+        'DiabetesPedigreeFunction': float(args[6]),
+        'Age': float(args[7])
+    }
+
+def error_result(e):
+    """Result reported when a prediction fails"""
+    return {
+        'error': str(e),
+        'prediction': 0,
+        'probability': 0.0,
+        'risk': 'Unknown',
+        'recommendations': ['Please try again or consult a healthcare professional.']
+    }
+
+def serve_stdio():
+    """Answer prediction requests from stdin until it closes (--serve-stdio).
+
+    Each line is a JSON object {"id": ..., "args": [...]} holding the command
+    line arguments of one call; each reply is one compact JSON line
+    {"id": ..., "result": {...}} with the result the command line would print.
+    """
+    predictor = DiabetesPredictor()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            args = [str(arg) for arg in request['args']]
+            if len(args) < 8:
+                result = {'error': MISSING_PARAMETERS}
+            else:
+                result = predictor.predict_diabetes(parse_arguments(args))
+        except Exception as e:
+            result = error_result(e)
+
+        sys.stdout.write(json.dumps({'id': request_id, 'result': result}, separators=(',', ':')) + '\n')
+        sys.stdout.flush()
+
 def main():
     """Main function to handle command line prediction"""
+    if sys.argv[1:2] == ['--serve-stdio']:
+        serve_stdio()
+        return
+
     try:
         # Initialize predictor
         predictor = DiabetesPredictor()
 
         # Get input data from command line arguments
         if len(sys.argv) < 9:
-            print(json.dumps({
-                'error': 'Missing input parameters. Required: pregnancies, glucose, bloodPressure, skinThickness, insulin, bmi, diabetesPedigreeFunction, age'
-            }))
+            print(json.dumps({'error': MISSING_PARAMETERS}))
             sys.exit(1)
 
         # Parse input parameters
-        input_data = {
-            'Pregnancies': float(sys.argv[1]),
-            'Glucose': float(sys.argv[2]),
-            'BloodPressure': float(sys.argv[3]),
-            'SkinThickness': float(sys.argv[4]),
-            'Insulin': float(sys.argv[5]),
-            'BMI': float(sys.argv[6]),
-            'DiabetesPedigreeFunction': float(sys.argv[7]),
-            'Age': float(sys.argv[8])
-        }
+        input_data = parse_arguments(sys.argv[1:])
 
         # Make prediction
         result = predictor.predict_diabetes(input_data)
@@ -159,13 +285,7 @@ def main():
         print(json.dumps(result, indent=2))
 
     except Exception as e:
-        print(json.dumps({
-            'error': str(e),
-            'prediction': 0,
-            'probability': 0.0,
-            'risk': 'Unknown',
-            'recommendations': ['Please try again or consult a healthcare professional.']
-        }))
+        print(json.dumps(error_result(e)))
 
 if __name__ == '__main__':
     main()
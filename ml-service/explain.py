@@ -0,0 +1,185 @@
+"""Per-feature contributions behind each ensemble member's score.
+
+An Explainer is built once per ModelSet, on its first explanation request, and
+holds everything that does not depend on the request: the background row (the
+mean of the scaled training data), each linear model's weights, every tree's
+per-node path contributions and the black-box models' score at the background.
+Explaining a row then costs a dot product for linear models, one traversal per
+tree for the forests and one small predict_proba call for the rest. The trees
+themselves are not copied: they are traversed in the ModelSet's own models, so
+memory-mapped ensembles stay shared between workers.
+
+Contributions are in each model's own output space (``output``) and are
+relative to ``base_value``, the model's output at the background:
+
+    linear        LogisticRegression and linear SGDClassifier. Exact:
+                  base_value + sum(contributions) is the decision value.
+    tree_path     RandomForest and GradientBoosting, the change in node value
+                  along each row's path credited to the split feature and
+                  averaged (forest) or summed (boosting) over trees. Also adds
+                  up exactly to the probability or the raw boosting score.
+    permutation   Anything else (SVC). Shapley values estimated over a fixed
+                  set of PERMUTATIONS antithetic feature orderings: features are
+                  switched from the background to the row one at a time and
+                  each is credited with the change it causes. Approximate per
+                  feature, but they add up exactly to the probability.
+"""
+import copy
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from model_store import SharedGradientBoosting, SharedRandomForest, _as_float32, to_shared_models
+
+# Rows explained per step, bounds the (rows, trees) and perturbed-row intermediates
+CHUNK_ROWS = 1024
+
+# Feature orderings averaged by PermutationExplanation (reversed pairs, so even)
+PERMUTATIONS = 8
+
+
+class LinearExplanation:
+    """Exact attributions of a binary linear model's decision value"""
+
+    method = 'linear'
+
+    def __init__(self, model, background):
+        self.coef = np.array(model.coef_[0], dtype=np.float64)
+        self.background = background
+        self.base_value = float(model.intercept_[0] + self.coef @ background)
+        self.output = 'decision' if getattr(model, 'loss', 'log_loss') == 'modified_huber' else 'log_odds'
+
+    def explain(self, model, X):
+        return (X - self.background) * self.coef
+
+
+class TreePathExplanation:
+    """Path attributions of a tree ensemble over a FlatForest of all its trees.
+
+    For every node, contribution[node] is the sum over the splits above it of the
+    child's value minus the parent's value, credited to the parent's split feature.
+    A row's attributions are then the contributions of the leaves it reaches, found
+    by traversing the model being explained; only the roots of its trees are kept.
+    """
+
+    method = 'tree_path'
+
+    def __init__(self, nodes, node_value, n_features, scale, offset, output):
+        self.roots = nodes.roots
+        self.scale = scale
+        self.output = output
+        self.base_value = float(offset + scale * node_value[nodes.roots].sum())
+
+        # Level by level from the roots; children inherit their parent's path
+        self.contribution = np.zeros((len(node_value), n_features))
+        parents = nodes.roots[nodes.children_left[nodes.roots] != -1]
+        while len(parents):
+            features = nodes.feature[parents]
+            next_parents = []
+            for children in (nodes.children_left[parents], nodes.children_right[parents]):
+                self.contribution[children] = self.contribution[parents]
+                self.contribution[children, features] += node_value[children] - node_value[parents]
+                next_parents.append(children[nodes.children_left[children] != -1])
+            parents = np.concatenate(next_parents)
+
+    @classmethod
+    def for_model(cls, model):
+        """Explanation of a SharedRandomForest or SharedGradientBoosting (or its sklearn original)"""
+        if isinstance(model, SharedRandomForest):
+            return cls(model.nodes, model.leaf_proba[:, 1], model.n_features_in_,
+                       1.0 / model.n_estimators, 0.0, 'probability')
+        return cls(model.nodes, model.leaf_value, model.n_features_in_,
+                   model.learning_rate, model.raw_init, 'log_odds')
+
+    def explain(self, model, X):
+        X = _as_float32(X)
+        contributions = np.zeros((X.shape[0], self.contribution.shape[1]))
+        if isinstance(model, (SharedRandomForest, SharedGradientBoosting)):
+            leaves = model.nodes.apply(X)
+        else:
+            # sklearn numbers each tree's nodes from 0 (as floats for boosting); make them flat indices
+            leaves = model.apply(X).reshape(X.shape[0], -1).astype(np.intp) + self.roots
+        for t in range(leaves.shape[1]):
+            contributions += self.contribution[leaves[:, t]]
+        return contributions * self.scale
+
+
+class PermutationExplanation:
+    """Sampled Shapley attributions of any predict_proba model, relative to a background row"""
+
+    method = 'permutation'
+    output = 'probability'
+
+    def __init__(self, model, background, permutations=PERMUTATIONS, random_state=42):
+        self.background = background
+        self.base_value = float(model.predict_proba(background[np.newaxis])[0, 1])
+
+        # Each ordering and its reverse, so every feature is seen both early and late
+        random = np.random.RandomState(random_state)
+        orders = []
+        for _ in range(permutations // 2):
+            order = random.permutation(len(background))
+            orders.extend([order, order[::-1]])
+        self.orders = np.array(orders)
+        # switched[m, k, j]: feature j comes from the row after k + 1 steps of ordering m
+        steps = np.argsort(self.orders, axis=1)
+        self.switched = steps[:, np.newaxis, :] <= np.arange(len(background))[np.newaxis, :, np.newaxis]
+
+    def explain(self, model, X):
+        n_rows, n_features = X.shape
+        perturbed = np.where(self.switched, X[:, np.newaxis, np.newaxis, :], self.background)
+        scores = model.predict_proba(perturbed.reshape(-1, n_features))[:, 1].reshape(n_rows, len(self.orders), n_features)
+
+        # The change at each step, credited to the feature switched at that step
+        gains = np.diff(scores, axis=2, prepend=self.base_value)
+        steps = np.argsort(self.orders, axis=1)
+        return np.take_along_axis(gains, np.broadcast_to(steps, gains.shape), axis=2).mean(axis=1)
+
+
+def explanation_for(model, background):
+    binary = len(getattr(model, 'classes_', ())) == 2
+    if binary and (isinstance(model, LogisticRegression) or (
+            isinstance(model, SGDClassifier) and model.loss in ('log_loss', 'modified_huber'))):
+        return LinearExplanation(model, background)
+    # The flat node arrays of model_store cover exactly the ensembles path attribution handles;
+    # a model that is already flat (memory-mapped) passes through unchanged
+    flat = to_shared_models({'model': model})['model']
+    if isinstance(flat, (SharedRandomForest, SharedGradientBoosting)):
+        return TreePathExplanation.for_model(flat)
+    return PermutationExplanation(model, background)
+
+
+class Explainer:
+    """Precomputed explanation state for every model of one ModelSet"""
+
+    def __init__(self, models, background, version=None):
+        self.background = np.asarray(background, dtype=np.float64)
+        self.version = version
+        self.explanations = {name: explanation_for(model, self.background) for name, model in models.items()}
+
+    def replaced(self, models, names, version):
+        """A copy for a ModelSet that differs from this one's only in the named models"""
+        explainer = copy.copy(self)
+        explainer.version = version
+        explainer.explanations = dict(self.explanations)
+        for name in names:
+            explainer.explanations[name] = explanation_for(models[name], self.background)
+        return explainer
+
+    def explain(self, models, X_scaled, names=None):
+        """{name: {'method', 'output', 'base_value', 'contributions' (rows, features)}} for scaled rows"""
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        result = {}
+        for name in names if names is not None else self.explanations:
+            explanation = self.explanations[name]
+            contributions = np.zeros(X_scaled.shape)
+            for start in range(0, len(X_scaled), CHUNK_ROWS):
+                chunk = X_scaled[start:start + CHUNK_ROWS]
+                contributions[start:start + len(chunk)] = explanation.explain(models[name], chunk)
+            result[name] = {
+                'method': explanation.method,
+                'output': explanation.output,
+                'base_value': explanation.base_value,
+                'contributions': contributions
+            }
+        return result
@@ -0,0 +1,24 @@
+"""gunicorn settings for the diabetes ML service: gunicorn -c gunicorn.conf.py"""
+import multiprocessing
+import os
+
+# One BLAS/OpenMP thread per worker; the workers already use every core
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+os.environ.setdefault('MKL_NUM_THREADS', '1')
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5002)}")
+
+# Load and warm the models in the master before forking (see wsgi.py)
+preload_app = True
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Threaded workers so concurrent /predict calls can share a micro-batch
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Retraining and large batches can take a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
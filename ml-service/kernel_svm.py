@@ -0,0 +1,96 @@
+import numpy as np
+from scipy.special import expit
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.svm import LinearSVC
+
+# Rows scored per step, bounds the (rows, n_components) intermediate for big batches
+CHUNK_ROWS = 4096
+
+
+class KernelApproxSVM(ClassifierMixin, BaseEstimator):
+    """Linear SVM on an approximate RBF feature map, with separate sigmoid calibration.
+
+    Fitting uses sklearn's Nystroem or RBFSampler, LinearSVC and
+    CalibratedClassifierCV (one held-out sigmoid fit, ensemble=False). The fitted
+    pieces are then collapsed into a few arrays: the feature map's parameters and
+    one weight vector in feature-map space. Scoring computes every row on its own
+    with einsum rather than BLAS matrix products, so a row gets the same result
+    whether it is scored alone or inside a batch.
+    """
+
+    def __init__(self, method='nystroem', n_components=300, gamma=None, C=1.0, cv=3, random_state=None):
+        self.method = method
+        self.n_components = n_components
+        self.gamma = gamma
+        self.C = C
+        self.cv = cv
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        gamma = self.gamma if self.gamma is not None else 1.0 / X.shape[1]
+
+        if self.method == 'nystroem':
+            feature_map = Nystroem(kernel='rbf', gamma=gamma, n_components=self.n_components,
+                                   random_state=self.random_state)
+        elif self.method == 'rff':
+            feature_map = RBFSampler(gamma=gamma, n_components=self.n_components, random_state=self.random_state)
+        else:
+            raise ValueError(f'Unknown kernel approximation: {self.method}')
+
+        calibrated = CalibratedClassifierCV(
+            LinearSVC(C=self.C, dual=False, random_state=self.random_state),
+            method='sigmoid', cv=self.cv, ensemble=False
+        ).fit(feature_map.fit_transform(X), y)
+
+        pair = calibrated.calibrated_classifiers_[0]
+        svm = pair.estimator
+        sigmoid = pair.calibrators[0]
+
+        self.classes_ = calibrated.classes_
+        self.n_features_in_ = X.shape[1]
+        self.gamma_ = gamma
+        self.intercept_ = float(svm.intercept_[0])
+        self.sigmoid_a_ = float(sigmoid.a_)
+        self.sigmoid_b_ = float(sigmoid.b_)
+
+        if self.method == 'nystroem':
+            # Nystroem features are K(x, centers) @ normalization.T, fold the projection into the weights
+            self.centers_ = feature_map.components_
+            self.center_norms_ = np.einsum('ij,ij->i', self.centers_, self.centers_)
+            self.weights_ = feature_map.normalization_.T @ svm.coef_[0]
+        else:
+            self.random_weights_ = feature_map.random_weights_
+            self.random_offset_ = feature_map.random_offset_
+            self.weights_ = svm.coef_[0] * np.sqrt(2.0 / self.n_components)
+
+        return self
+
+    def _features(self, X):
+        if self.method == 'nystroem':
+            sq_dist = (np.einsum('ij,ij->i', X, X)[:, np.newaxis]
+                       - 2 * np.einsum('ik,jk->ij', X, self.centers_)
+                       + self.center_norms_)
+            np.maximum(sq_dist, 0, out=sq_dist)
+            return np.exp(-self.gamma_ * sq_dist)
+        return np.cos(np.einsum('ik,kj->ij', X, self.random_weights_) + self.random_offset_)
+
+    def decision_function(self, X):
+        # C order: einsum sums a Fortran-ordered matrix's rows in a different order
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        decision = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            features = self._features(X[start:start + CHUNK_ROWS])
+            decision[start:start + CHUNK_ROWS] = np.einsum('ij,j->i', features, self.weights_) + self.intercept_
+        return decision
+
+    def predict_proba(self, X):
+        proba = np.empty((len(X), 2))
+        proba[:, 1] = expit(-(self.sigmoid_a_ * self.decision_function(X) + self.sigmoid_b_))
+        proba[:, 0] = 1.0 - proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
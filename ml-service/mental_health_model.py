@@ -1,8 +1,14 @@
+import os
 import sys
 import json
+import itertools
+from array import array
 
 class MentalHealthPredictor:
-    def __init__(self):
+    def __init__(self, outcome_table=None):
+        # Optional OutcomeTable of every combination of the four totals
+        self.outcome_table = outcome_table
+
         # Severity thresholds based on clinical guidelines
         self.depression_thresholds = {
             'minimal': 5,
@@ -39,22 +45,30 @@ class MentalHealthPredictor:
         pss_score = sum(input_data['pss_answers'])
         who5_score = sum(input_data['who5_answers'])
 
-        # Determine severity levels
-        depression_level = self._get_depression_level(phq9_score)
-        anxiety_level = self._get_anxiety_level(gad7_score)
-        stress_level = self._get_stress_level(pss_score)
-        wellbeing_level = self._get_wellbeing_level(who5_score)
-
-        # Overall mental health status
-        overall_status = self._calculate_overall_status(
-            depression_level, anxiety_level, stress_level, wellbeing_level
-        )
+        # Severity levels, overall status and recommendations depend only on the totals
+        outcome = None
+        if self.outcome_table is not None:
+            outcome = self.outcome_table.lookup(phq9_score, gad7_score, pss_score, who5_score)
 
-        # Generate recommendations
-        recommendations = self._generate_recommendations(
-            phq9_score, gad7_score, pss_score, who5_score,
-            depression_level, anxiety_level, stress_level, wellbeing_level
-        )
+        if outcome is not None:
+            depression_level, anxiety_level, stress_level, wellbeing_level, overall_status, recommendations = outcome
+        else:
+            # Determine severity levels
+            depression_level = self._get_depression_level(phq9_score)
+            anxiety_level = self._get_anxiety_level(gad7_score)
+            stress_level = self._get_stress_level(pss_score)
+            wellbeing_level = self._get_wellbeing_level(who5_score)
+
+            # Overall mental health status
+            overall_status = self._calculate_overall_status(
+                depression_level, anxiety_level, stress_level, wellbeing_level
+            )
+
+            # Generate recommendations
+            recommendations = self._generate_recommendations(
+                phq9_score, gad7_score, pss_score, who5_score,
+                depression_level, anxiety_level, stress_level, wellbeing_level
+            )
 
         # Calculate risk factors
         risk_factors = self._calculate_risk_factors(input_data)
@@ -75,16 +89,163 @@ class MentalHealthPredictor:
             'overall_status': overall_status,
             'recommendations': recommendations,
             'risk_factors': risk_factors,
-            'model_info': {
-                'name': 'Comprehensive Mental Health Assessment',
-                'questionnaires': ['PHQ-9', 'GAD-7', 'PSS-10', 'WHO-5'],
-                'assessments': ['Depression', 'Anxiety', 'Stress', 'Well-being'],
-                'accuracy': 'Clinically Validated',
-                'algorithm': 'Standardized Scoring System',
-                'features_used': 31
-            }
+            'model_info': self._model_info()
+        }
+
+    def _model_info(self):
+        return {
+            'name': 'Comprehensive Mental Health Assessment',
+            'questionnaires': ['PHQ-9', 'GAD-7', 'PSS-10', 'WHO-5'],
+            'assessments': ['Depression', 'Anxiety', 'Stress', 'Well-being'],
+            'accuracy': 'Clinically Validated',
+            'algorithm': 'Standardized Scoring System',
+            'features_used': 31
+        }
+
+    # Item columns of the (N, 31) response matrix, in command line order
+    QUESTIONNAIRE_ITEMS = {'phq9': slice(0, 9), 'gad7': slice(9, 16), 'pss': slice(16, 26), 'who5': slice(26, 31)}
+
+    # Items summed into each subscale of _calculate_risk_factors, by questionnaire item index
+    SUBSCALES = {
+        'depression_symptoms': ('phq9', {
+            'anhedonia': (1, 5),
+            'mood_disturbance': (0, 8),
+            'somatic_symptoms': (2, 3, 6),
+            'cognitive_symptoms': (4, 7)
+        }),
+        'anxiety_symptoms': ('gad7', {
+            'general_anxiety': (0, 1),
+            'worry_excess': (2, 3),
+            'physical_symptoms': (4, 5, 6)
+        }),
+        'stress_factors': ('pss', {
+            'uncontrollable_stress': (0, 1, 2, 3),
+            'overload_stress': (4, 5, 6, 7),
+            'coping_difficulty': (8, 9)
+        }),
+        'wellbeing_factors': ('who5', {
+            'positive_mood': (0, 3),
+            'energy_vitality': (1, 4),
+            'interest_engagement': (2,)
+        })
+    }
+
+    # Number of possible totals of PHQ-9, GAD-7, PSS-10 and WHO-5 (0 to the maximum score)
+    TOTAL_SIZES = (28, 22, 41, 26)
+
+    # Totals at which _generate_recommendations changes what it adds, per questionnaire
+    RECOMMENDATION_CUTOFFS = ((10, 15), (10, 15), (20, 27), (13,))
+
+    # Points of each severity label in _calculate_overall_status
+    SEVERITY_POINTS = {
+        'Minimal Depression': 0, 'Mild Depression': 1, 'Moderate Depression': 2,
+        'Moderately Severe Depression': 3, 'Severe Depression': 4,
+        'Minimal Anxiety': 0, 'Mild Anxiety': 1, 'Moderate Anxiety': 2, 'Severe Anxiety': 3,
+        'Low Stress': 0, 'Moderate Stress': 1, 'High Stress': 2,
+        'Poor Well-being': 3, 'Fair Well-being': 2, 'Good Well-being': 1,
+        'Very Good Well-being': 0, 'Excellent Well-being': 0
+    }
+
+    # First score of every band after the lowest, the labels of the _get_*_level methods, and
+    # each label's points in _calculate_overall_status
+    SEVERITY_BANDS = {
+        'depression': ('phq9_total', (5, 10, 15, 20),
+                       ('Minimal Depression', 'Mild Depression', 'Moderate Depression',
+                        'Moderately Severe Depression', 'Severe Depression'), (0, 1, 2, 3, 4)),
+        'anxiety': ('gad7_total', (5, 10, 15),
+                    ('Minimal Anxiety', 'Mild Anxiety', 'Moderate Anxiety', 'Severe Anxiety'), (0, 1, 2, 3)),
+        'stress': ('pss_total', (14, 27), ('Low Stress', 'Moderate Stress', 'High Stress'), (0, 1, 2)),
+        'wellbeing': ('who5_total', (7, 13, 17, 21),
+                      ('Poor Well-being', 'Fair Well-being', 'Good Well-being', 'Very Good Well-being',
+                       'Excellent Well-being'), (3, 2, 1, 0, 0))
+    }
+
+    # First total of every overall status after 'Excellent Mental Health'
+    OVERALL_BANDS = ((3, 5, 7, 9), ('Excellent Mental Health', 'Good Mental Health', 'Fair Mental Health',
+                                    'Poor Mental Health', 'Critical Mental Health'))
+
+    def _indicator_matrix(self):
+        """(31, 17) 0/1 matrix: responses @ it gives the four totals, then every subscale"""
+        import numpy as np
+
+        columns = [list(range(31))[items] for items in self.QUESTIONNAIRE_ITEMS.values()]
+        for questionnaire, subscales in self.SUBSCALES.values():
+            offset = self.QUESTIONNAIRE_ITEMS[questionnaire].start
+            columns.extend([offset + item for item in items] for items in subscales.values())
+
+        matrix = np.zeros((31, len(columns)), dtype=np.int64)
+        for index, items in enumerate(columns):
+            matrix[items, index] = 1
+        return matrix
+
+    def predict_mental_health_batch(self, responses, recommendations=False):
+        """Assess N people at once from an (N, 31) matrix of integer item responses.
+
+        Columns are the PHQ-9, GAD-7, PSS-10 and WHO-5 answers in command line order.
+        One matrix multiply against a fixed item-to-subscale indicator matrix gives
+        the totals and subscales, and np.searchsorted on the band cutoffs gives the
+        severity levels and overall status. Everything is returned as length-N
+        arrays in the layout of predict_mental_health. With recommendations=True each
+        row's list is added, computed once per distinct combination of the bands it
+        depends on.
+        """
+        # Imported here so the one-shot command line does not pay for NumPy
+        import numpy as np
+
+        responses = np.asarray(responses)
+        if responses.ndim != 2 or responses.shape[1] != 31:
+            raise ValueError('Expected an (N, 31) matrix of PHQ-9, GAD-7, PSS-10 and WHO-5 answers')
+        if not np.issubdtype(responses.dtype, np.integer):
+            if not np.array_equal(responses, np.round(responses)):
+                raise ValueError('Answers must be whole numbers')
+        responses = responses.astype(np.int64)
+
+        sums = responses @ self._indicator_matrix()
+        totals = dict(zip(('phq9_total', 'gad7_total', 'pss_total', 'who5_total'), sums[:, :4].T))
+
+        severity_levels = {}
+        overall_points = np.zeros(len(responses), dtype=np.int64)
+        for name, (total, cutoffs, labels, points) in self.SEVERITY_BANDS.items():
+            band = np.searchsorted(cutoffs, totals[total], side='right')
+            severity_levels[name] = np.array(labels)[band]
+            overall_points += np.array(points)[band]
+
+        cutoffs, labels = self.OVERALL_BANDS
+        overall_status = np.array(labels)[np.searchsorted(cutoffs, overall_points, side='right')]
+
+        risk_factors = {}
+        column = 4
+        for group, (_, subscales) in self.SUBSCALES.items():
+            risk_factors[group] = {}
+            for name in subscales:
+                risk_factors[group][name] = sums[:, column]
+                column += 1
+
+        result = {
+            'scores': totals,
+            'severity_levels': severity_levels,
+            'overall_status': overall_status,
+            'risk_factors': risk_factors,
+            'model_info': self._model_info()
         }
 
+        if recommendations:
+            # _generate_recommendations only branches on these bands of the four totals
+            codes = ((((totals['phq9_total'] >= 10).astype(int) + (totals['phq9_total'] >= 15)) * 3
+                      + (totals['gad7_total'] >= 10) + (totals['gad7_total'] >= 15)) * 3
+                     + (totals['pss_total'] >= 20) + (totals['pss_total'] >= 27)) * 2 + (totals['who5_total'] <= 12)
+            _, first_rows, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            lists = [
+                self._generate_recommendations(
+                    *(int(totals[name][row]) for name in totals),
+                    *(str(severity_levels[name][row]) for name in severity_levels)
+                )
+                for row in first_rows
+            ]
+            result['recommendations'] = [lists[index] for index in inverse.tolist()]
+
+        return result
+
     def _get_depression_level(self, score):
         """Determine depression severity based on PHQ-9 score"""
         if score <= 4:
@@ -133,20 +294,11 @@ class MentalHealthPredictor:
 
     def _calculate_overall_status(self, depression, anxiety, stress, wellbeing):
         """Calculate overall mental health status"""
-        severity_map = {
-            'Minimal Depression': 0, 'Mild Depression': 1, 'Moderate Depression': 2,
-            'Moderately Severe Depression': 3, 'Severe Depression': 4,
-            'Minimal Anxiety': 0, 'Mild Anxiety': 1, 'Moderate Anxiety': 2, 'Severe Anxiety': 3,
-            'Low Stress': 0, 'Moderate Stress': 1, 'High Stress': 2,
-            'Poor Well-being': 3, 'Fair Well-being': 2, 'Good Well-being': 1,
-            'Very Good Well-being': 0, 'Excellent Well-being': 0
-        }
-
         total_score = (
-            severity_map.get(depression, 0) +
-            severity_map.get(anxiety, 0) +
-            severity_map.get(stress, 0) +
-            severity_map.get(wellbeing, 0)
+            self.SEVERITY_POINTS.get(depression, 0) +
+            self.SEVERITY_POINTS.get(anxiety, 0) +
+            self.SEVERITY_POINTS.get(stress, 0) +
+            self.SEVERITY_POINTS.get(wellbeing, 0)
         )
 
         if total_score <= 2:
@@ -271,31 +423,361 @@ class MentalHealthPredictor:
 
         return risk_factors
 
+class OutcomeTable:
+    """Severity levels, overall status and recommendations for every combination of the four totals.
+
+    predict_mental_health derives all of these from the PHQ-9, GAD-7, PSS-10 and
+    WHO-5 totals alone, so they can be worked out once for all 28 x 22 x 41 x 26
+    combinations. Each cell holds a uint16 id into a few hundred distinct outcomes,
+    and the outcomes share interned recommendation lists. Totals outside the
+    ranges (answers above a questionnaire's maximum) are not covered: lookup
+    returns None and the predictor computes those as before.
+    """
+
+    FORMAT = 'mindbloom-mental-health-outcomes/1'
+
+    def __init__(self, cells, outcomes, recommendation_sets):
+        self.cells = cells                              # array('H'), one outcome id per combination
+        self.outcomes = outcomes                        # (4 severity levels, overall status, recommendation set id)
+        self.recommendation_sets = recommendation_sets  # tuples of recommendation strings
+
+    @classmethod
+    def build(cls, predictor=None):
+        """Table computed with predictor's own scoring methods"""
+        predictor = predictor or MentalHealthPredictor()
+        level_functions = (predictor._get_depression_level, predictor._get_anxiety_level,
+                           predictor._get_stress_level, predictor._get_wellbeing_level)
+
+        # Totals with the same severity level and the same recommendation cutoffs crossed
+        # score identically, so each axis collapses to a few classes with a representative total
+        axis_classes = []
+        representatives = []
+        for size, level, cutoffs in zip(MentalHealthPredictor.TOTAL_SIZES, level_functions,
+                                        MentalHealthPredictor.RECOMMENDATION_CUTOFFS):
+            keys = [(level(total), sum(total >= cutoff for cutoff in cutoffs)) for total in range(size)]
+            first_totals = {}
+            for total, key in enumerate(keys):
+                first_totals.setdefault(key, total)
+            class_ids = {key: index for index, key in enumerate(first_totals)}
+            axis_classes.append([class_ids[key] for key in keys])
+            representatives.append(list(first_totals.values()))
+
+        outcome_ids = {}
+        set_ids = {}
+        class_outcomes = {}
+        for combination in itertools.product(*(range(len(totals)) for totals in representatives)):
+            totals = [representatives[axis][index] for axis, index in enumerate(combination)]
+            levels = tuple(level(total) for level, total in zip(level_functions, totals))
+            overall_status = predictor._calculate_overall_status(*levels)
+            recommendations = tuple(sys.intern(text) for text in predictor._generate_recommendations(*totals, *levels))
+            set_id = set_ids.setdefault(recommendations, len(set_ids))
+            class_outcomes[combination] = outcome_ids.setdefault(levels + (overall_status, set_id), len(outcome_ids))
+
+        # Cells in C order; every WHO-5 row for the same PHQ-9/GAD-7/PSS classes is identical
+        phq9_classes, gad7_classes, pss_classes, who5_classes = axis_classes
+        rows = {}
+        cells = array('H')
+        for phq9 in phq9_classes:
+            for gad7 in gad7_classes:
+                for pss in pss_classes:
+                    row = rows.get((phq9, gad7, pss))
+                    if row is None:
+                        row = array('H', (class_outcomes[(phq9, gad7, pss, who5)] for who5 in who5_classes))
+                        rows[(phq9, gad7, pss)] = row
+                    cells.extend(row)
+
+        return cls(cells, list(outcome_ids), list(set_ids))
+
+    def lookup(self, phq9, gad7, pss, who5):
+        """(depression, anxiety, stress, wellbeing, overall_status, recommendations), or None outside the table"""
+        phq9_size, gad7_size, pss_size, who5_size = MentalHealthPredictor.TOTAL_SIZES
+        if not (0 <= phq9 < phq9_size and 0 <= gad7 < gad7_size and 0 <= pss < pss_size and 0 <= who5 < who5_size):
+            return None
+        depression, anxiety, stress, wellbeing, overall_status, set_id = \
+            self.outcomes[self.cells[((phq9 * gad7_size + gad7) * pss_size + pss) * who5_size + who5]]
+        # A fresh list, so callers can change it without touching the shared set
+        return depression, anxiety, stress, wellbeing, overall_status, list(self.recommendation_sets[set_id])
+
+    def save(self, path):
+        """Write the table as one JSON header line followed by the raw cell ids"""
+        header = {
+            'format': self.FORMAT,
+            'sizes': MentalHealthPredictor.TOTAL_SIZES,
+            'byteorder': sys.byteorder,
+            'outcomes': self.outcomes,
+            'recommendation_sets': self.recommendation_sets
+        }
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+            self.cells.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """Table written by save()"""
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != cls.FORMAT or tuple(header.get('sizes', ())) != MentalHealthPredictor.TOTAL_SIZES:
+                raise ValueError(f'{path} is not a compatible mental health outcome table')
+            phq9_size, gad7_size, pss_size, who5_size = MentalHealthPredictor.TOTAL_SIZES
+            cells = array('H')
+            cells.fromfile(f, phq9_size * gad7_size * pss_size * who5_size)
+        if header['byteorder'] != sys.byteorder:
+            cells.byteswap()
+
+        outcomes = [tuple(sys.intern(value) if isinstance(value, str) else value for value in outcome)
+                    for outcome in header['outcomes']]
+        if max(cells) >= len(outcomes):
+            raise ValueError(f'{path} refers to outcomes it does not contain')
+        recommendation_sets = [tuple(sys.intern(text) for text in texts) for texts in header['recommendation_sets']]
+        return cls(cells, outcomes, recommendation_sets)
+
+    def memory_usage(self):
+        """Sizes and approximate resident bytes of the table"""
+        strings = {}
+        for outcome in self.outcomes:
+            strings.update((id(value), value) for value in outcome[:5])
+        for texts in self.recommendation_sets:
+            strings.update((id(text), text) for text in texts)
+
+        table_bytes = sys.getsizeof(self.cells)
+        outcome_bytes = (
+            sys.getsizeof(self.outcomes) + sum(sys.getsizeof(outcome) for outcome in self.outcomes) +
+            sys.getsizeof(self.recommendation_sets) + sum(sys.getsizeof(texts) for texts in self.recommendation_sets) +
+            sum(sys.getsizeof(text) for text in strings.values())
+        )
+        return {
+            'combinations': len(self.cells),
+            'outcomes': len(self.outcomes),
+            'recommendation_sets': len(self.recommendation_sets),
+            'table_bytes': table_bytes,
+            'outcome_bytes': outcome_bytes,
+            'total_bytes': table_bytes + outcome_bytes
+        }
+
+def load_outcome_table(path=None):
+    """OutcomeTable read from path, or built (and saved to path) when there is no file yet"""
+    if path and os.path.exists(path):
+        return OutcomeTable.load(path)
+    table = OutcomeTable.build()
+    if path:
+        table.save(path)
+    return table
+
+class CohortSummary:
+    """Population statistics over any number of assessments, fed one chunk at a time.
+
+    Every total and subscale is a small non-negative integer, so the summary keeps
+    an exact histogram of each (plus counts of the overall status) and derives
+    band counts, means, standard deviations and percentiles from those. Memory
+    does not grow with the number of assessments, and merge() of summaries built
+    from separate shards gives exactly the report of a single pass over all of them.
+    """
+
+    FORMAT = 'mindbloom-mental-health-cohort/1'
+
+    def __init__(self, predictor=None):
+        self.predictor = predictor or MentalHealthPredictor()
+        self.assessments = 0
+        self.histograms = {}        # 'phq9_total', ..., 'depression_symptoms.anhedonia', ... -> counts per value
+        self.overall_status = {}    # label -> count
+
+    def update(self, responses):
+        """Add a chunk: an (N, 31) answer matrix or a list of predict_mental_health input dicts"""
+        import numpy as np
+
+        if len(responses) and isinstance(responses[0], dict):
+            responses = [record['phq9_answers'] + record['gad7_answers'] + record['pss_answers'] + record['who5_answers']
+                         for record in responses]
+        responses = np.asarray(responses)
+        if responses.size == 0:
+            return self
+        if (responses < 0).any():
+            raise ValueError('Answers must not be negative')
+
+        result = self.predictor.predict_mental_health_batch(responses)
+        columns = dict(result['scores'])
+        for group, subscales in result['risk_factors'].items():
+            columns.update((f'{group}.{name}', values) for name, values in subscales.items())
+        for name, values in columns.items():
+            self._add_histogram(name, np.bincount(values))
+
+        labels, counts = np.unique(result['overall_status'], return_counts=True)
+        for label, count in zip(labels.tolist(), counts.tolist()):
+            self.overall_status[label] = self.overall_status.get(label, 0) + count
+        self.assessments += len(responses)
+        return self
+
+    def merge(self, other):
+        """Fold another summary (e.g. from a parallel shard) into this one"""
+        for name, counts in other.histograms.items():
+            self._add_histogram(name, counts)
+        for label, count in other.overall_status.items():
+            self.overall_status[label] = self.overall_status.get(label, 0) + count
+        self.assessments += other.assessments
+        return self
+
+    def _add_histogram(self, name, counts):
+        import numpy as np
+
+        current = self.histograms.get(name)
+        if current is None:
+            self.histograms[name] = np.array(counts, dtype=np.int64)
+            return
+        if len(counts) > len(current):
+            current = np.pad(current, (0, len(counts) - len(current)))
+        current[:len(counts)] += counts
+        self.histograms[name] = current
+
+    def to_dict(self):
+        """JSON-serializable form, for shipping a shard's summary to wherever they are merged"""
+        return {
+            'format': self.FORMAT,
+            'assessments': self.assessments,
+            'histograms': {name: counts.tolist() for name, counts in self.histograms.items()},
+            'overall_status': dict(self.overall_status)
+        }
+
+    @classmethod
+    def from_dict(cls, data, predictor=None):
+        import numpy as np
+
+        if data.get('format') != cls.FORMAT:
+            raise ValueError('Not a mental health cohort summary')
+        summary = cls(predictor)
+        summary.assessments = data['assessments']
+        summary.histograms = {name: np.array(counts, dtype=np.int64) for name, counts in data['histograms'].items()}
+        summary.overall_status = dict(data['overall_status'])
+        return summary
+
+    def report(self, percentiles=(5, 25, 50, 75, 95)):
+        """Band counts, score distributions and subscale statistics of everything added so far.
+
+        Percentiles are nearest-rank: the smallest value with at least that share of
+        assessments at or below it (np.percentile's 'inverted_cdf' method).
+        """
+        import numpy as np
+
+        def distribution(counts, histogram=False):
+            values = np.arange(len(counts))
+            present = np.flatnonzero(counts)
+            total = int(counts.sum())
+            # Exact integer sums, so the moments do not depend on how the data was chunked
+            value_sum = sum(int(count) * value for value, count in enumerate(counts.tolist()))
+            square_sum = sum(int(count) * value * value for value, count in enumerate(counts.tolist()))
+            cumulative = np.cumsum(counts)
+            stats = {
+                'mean': value_sum / total,
+                'std': ((total * square_sum - value_sum ** 2) / total ** 2) ** 0.5,
+                'min': int(values[present[0]]),
+                'max': int(values[present[-1]]),
+                'percentiles': {
+                    f'p{q:g}': int(np.searchsorted(cumulative, max(1, -(-total * q // 100)), side='left'))
+                    for q in percentiles
+                }
+            }
+            if histogram:
+                stats['histogram'] = counts.tolist()
+            return stats
+
+        report = {'assessments': self.assessments, 'scores': {}, 'severity_levels': {},
+                  'overall_status': {}, 'risk_factors': {}}
+        if not self.assessments:
+            return report
+
+        for name, (total, cutoffs, labels, _) in self.predictor.SEVERITY_BANDS.items():
+            counts = self.histograms[total]
+            bands = np.searchsorted(cutoffs, np.arange(len(counts)), side='right')
+            band_counts = np.bincount(bands, weights=counts, minlength=len(labels)).astype(np.int64)
+            report['severity_levels'][name] = dict(zip(labels, band_counts.tolist()))
+
+        for total in ('phq9_total', 'gad7_total', 'pss_total', 'who5_total'):
+            report['scores'][total] = distribution(self.histograms[total], histogram=True)
+
+        # Every status in severity order, including those nobody had
+        for label in self.predictor.OVERALL_BANDS[1]:
+            report['overall_status'][label] = self.overall_status.get(label, 0)
+
+        for group, (_, subscales) in self.predictor.SUBSCALES.items():
+            report['risk_factors'][group] = {
+                name: distribution(self.histograms[f'{group}.{name}']) for name in subscales
+            }
+
+        return report
+
+MISSING_PARAMETERS = 'Missing input parameters. Required: 9 PHQ-9 answers + 7 GAD-7 answers + 10 PSS answers + 5 WHO-5 answers'
+
+def parse_arguments(args):
+    """Input data from the command line arguments (without the script name)"""
+    phq9_answers = [int(x) for x in args[0:9]]      # PHQ-9: 9 questions
+    gad7_answers = [int(x) for x in args[9:16]]     # GAD-7: 7 questions
+    pss_answers = [int(x) for x in args[16:26]]     # PSS-10: 10 questions
+    who5_answers = [int(x) for x in args[26:31]]    # WHO-5: 5 questions
+
+    return {
+        'phq9_answers': phq9_answers,
+        'gad7_answers': gad7_answers,
+        'pss_answers': pss_answers,
+        'who5_answers': who5_answers
+    }
+
+def error_result(e):
+    """Result reported when a prediction fails"""
+    return {
+        'error': str(e),
+        'overall_status': 'Unable to assess',
+        'recommendations': ['Please consult a mental health professional for proper evaluation.']
+    }
+
+def serve_stdio(outcome_table=None):
+    """Answer prediction requests from stdin until it closes (--serve-stdio).
+
+    Each line is a JSON object {"id": ..., "args": [...]} holding the command
+    line arguments of one call; each reply is one compact JSON line
+    {"id": ..., "result": {...}} with the result the command line would print.
+    """
+    predictor = MentalHealthPredictor(outcome_table)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            args = [str(arg) for arg in request['args']]
+            if len(args) < 31:
+                result = {'error': MISSING_PARAMETERS}
+            else:
+                result = predictor.predict_mental_health(parse_arguments(args))
+        except Exception as e:
+            result = error_result(e)
+
+        sys.stdout.write(json.dumps({'id': request_id, 'result': result}, separators=(',', ':')) + '\n')
+        sys.stdout.flush()
+
 def main():
     """Main function to handle command line prediction"""
+    if sys.argv[1:2] == ['--serve-stdio']:
+        # --serve-stdio --outcome-table [PATH]: build the OutcomeTable, or load it from PATH
+        outcome_table = None
+        if sys.argv[2:3] == ['--outcome-table']:
+            outcome_table = load_outcome_table(sys.argv[3] if len(sys.argv) > 3 else None)
+            usage = outcome_table.memory_usage()
+            sys.stderr.write(f"Outcome table: {usage['outcomes']} outcomes, {usage['total_bytes'] / 1e6:.2f} MB\n")
+        serve_stdio(outcome_table)
+        return
+
     try:
         predictor = MentalHealthPredictor()
 
         # Get input data from command line arguments
         if len(sys.argv) < 32:  # 31 questions + script name
-            print(json.dumps({
-                'error': 'Missing input parameters. Required: 9 PHQ-9 answers + 7 GAD-7 answers + 10 PSS answers + 5 WHO-5 answers'
-            }))
+            print(json.dumps({'error': MISSING_PARAMETERS}))
             sys.exit(1)
 
         # Parse input parameters
-        args = sys.argv[1:]
-        phq9_answers = [int(x) for x in args[0:9]]      # PHQ-9: 9 questions
-        gad7_answers = [int(x) for x in args[9:16]]     # GAD-7: 7 questions
-        pss_answers = [int(x) for x in args[16:26]]     # PSS-10: 10 questions
-        who5_answers = [int(x) for x in args[26:31]]    # WHO-5: 5 questions
-
-        input_data = {
-            'phq9_answers': phq9_answers,
-            'gad7_answers': gad7_answers,
-            'pss_answers': pss_answers,
-            'who5_answers': who5_answers
-        }
+        input_data = parse_arguments(sys.argv[1:])
 
         # Make prediction
         result = predictor.predict_mental_health(input_data)
@@ -304,11 +786,7 @@ def main():
         print(json.dumps(result, indent=2))
 
     except Exception as e:
-        print(json.dumps({
-            'error': str(e),
-            'overall_status': 'Unable to assess',
-            'recommendations': ['Please consult a mental health professional for proper evaluation.']
-        }))
+        print(json.dumps(error_result(e)))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collect concurrent single-row requests and score them as one batch.
+
+    A background thread takes the first waiting row, then keeps collecting
+    rows until either ``max_batch_size`` rows are queued or ``max_wait_ms``
+    has passed since that first row arrived. Rows are scored with one call to
+    ``score_fn(rows, context)`` per distinct ``context`` they were submitted
+    with (the ModelSet a request read, so a swap mid-batch cannot mix sets) and
+    every caller gets back ``(batch_result, row_index)``. If a batched call
+    raises, its rows are scored one at a time, so only the rows that fail on
+    their own get the exception.
+    """
+
+    def __init__(self, score_fn, max_batch_size=32, max_wait_ms=2.0, latency_window=2048):
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # Stats
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._max_seen = 0
+        self._size_counts = {}
+        self._latencies = deque(maxlen=latency_window)
+
+    def _ensure_started(self):
+        """Start the worker thread, again after a fork since threads do not survive it"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='microbatch', daemon=True)
+                self._thread.start()
+
+    def submit(self, row, context=None):
+        """Queue one feature row and return a Future for its (batch_result, index)"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=float), future, time.perf_counter(), context))
+        return future
+
+    def predict(self, row, context=None, timeout=None):
+        """Queue one feature row and wait for its (batch_result, index)"""
+        return self.submit(row, context).result(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first row, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            collected = self._collect()
+            # Almost always one group; more only when the contexts changed during the wait
+            groups = {}
+            for item in collected:
+                groups.setdefault(id(item[3]), []).append(item)
+            for batch in groups.values():
+                self._score(batch)
+
+    def _score(self, batch):
+        rows = np.vstack([item[0] for item in batch])
+
+        try:
+            result = self.score_fn(rows, batch[0][3])
+        except Exception as e:
+            if len(batch) == 1:
+                with self._lock:
+                    self._errors += 1
+                batch[0][1].set_exception(e)
+                return
+            # One bad row must not fail the requests it happened to share a batch with
+            for item in batch:
+                self._score([item])
+            return
+
+        done = time.perf_counter()
+        with self._lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._max_seen = max(self._max_seen, len(batch))
+            self._size_counts[len(batch)] = self._size_counts.get(len(batch), 0) + 1
+            self._latencies.extend(done - item[2] for item in batch)
+
+        for index, item in enumerate(batch):
+            item[1].set_result((result, index))
+
+    def stats(self):
+        """Queue depth, batch size distribution and queueing+scoring latency percentiles"""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            stats = {
+                'enabled': True,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'queue_depth': self._queue.qsize(),
+                'requests': self._requests,
+                'batches': self._batches,
+                'errors': self._errors,
+                'avg_batch_size': round(self._requests / self._batches, 2) if self._batches else 0.0,
+                'max_batch_size_seen': self._max_seen,
+                'batch_size_counts': {str(size): count for size, count in sorted(self._size_counts.items())}
+            }
+
+        if len(latencies):
+            stats['latency_ms'] = {
+                'p50': round(float(np.percentile(latencies, 50)), 3),
+                'p99': round(float(np.percentile(latencies, 99)), 3),
+                'max': round(float(latencies.max()), 3)
+            }
+        return stats
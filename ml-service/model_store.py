@@ -0,0 +1,168 @@
+import numpy as np
+from scipy.special import expit
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+# Rows traversed per step, bounds the (rows, trees) index matrices for big batches
+CHUNK_ROWS = 4096
+
+
+class FlatForest:
+    """The nodes of every tree in an ensemble, concatenated into flat arrays.
+
+    Fitted sklearn trees copy their node arrays into private memory when they are
+    unpickled, so they cannot be memory-mapped. Plain NumPy arrays can: stored
+    uncompressed with joblib and loaded with ``mmap_mode='c'``, every worker on
+    a node reads the same page-cache copy. The mapping is copy-on-write rather
+    than read-only because other models in the same file (the SVC) hand their
+    arrays to libsvm, which rejects read-only buffers; pages stay shared as long
+    as nobody writes to them.
+    """
+
+    def __init__(self, trees):
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1].astype(np.intp)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+        # Child indices become global; leaves keep -1
+        left, right = [], []
+        for offset, tree in zip(offsets, trees):
+            left.append(np.where(tree.children_left == -1, -1, tree.children_left + offset))
+            right.append(np.where(tree.children_right == -1, -1, tree.children_right + offset))
+
+        self.children_left = np.concatenate(left).astype(np.intp)
+        self.children_right = np.concatenate(right).astype(np.intp)
+        self.feature = np.concatenate([tree.feature for tree in trees]).astype(np.intp)
+        self.threshold = np.concatenate([tree.threshold for tree in trees])
+
+    def apply(self, X):
+        """Leaf index reached by every row in every tree, shape (n_rows, n_trees)"""
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        node = np.tile(self.roots, (X.shape[0], 1))
+
+        for _ in range(self.max_depth):
+            left = self.children_left[node]
+            internal = left != -1
+            if not internal.any():
+                break
+            # Same comparison as sklearn: float32 feature value against a float64 threshold
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, left, self.children_right[node]), node)
+
+        return node
+
+
+def _as_float32(X):
+    """Validate and cast input the way sklearn trees do before traversal"""
+    X = np.asarray(X, dtype=np.float32)
+    if not np.isfinite(X).all():
+        raise ValueError('Input contains NaN, infinity or a value too large for dtype(\'float32\').')
+    return X
+
+
+class SharedRandomForest:
+    """RandomForestClassifier.predict_proba over a FlatForest, bit-identical to sklearn"""
+
+    def __init__(self, forest):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.n_estimators = len(trees)
+        self.nodes = FlatForest(trees)
+
+        # Per-tree leaf probabilities, normalized exactly like DecisionTreeClassifier.predict_proba
+        value = np.concatenate([tree.value[:, 0, :len(self.classes_)] for tree in trees])
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        self.leaf_proba = value / normalizer
+
+    def predict_proba(self, X):
+        X = _as_float32(X)
+        proba = np.zeros((X.shape[0], len(self.classes_)), dtype=np.float64)
+
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaves = self.nodes.apply(X[start:start + CHUNK_ROWS])
+            out = proba[start:start + CHUNK_ROWS]
+            # Accumulate tree by tree in estimator order, as the forest does
+            for t in range(self.n_estimators):
+                out += self.leaf_proba[leaves[:, t]]
+
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class SharedGradientBoosting:
+    """Binary GradientBoostingClassifier.predict_proba over a FlatForest, bit-identical to sklearn"""
+
+    def __init__(self, booster):
+        trees = [estimator.tree_ for estimator in booster.estimators_[:, 0]]
+        self.classes_ = booster.classes_
+        self.n_features_in_ = booster.n_features_in_
+        self.n_estimators = len(trees)
+        self.learning_rate = booster.learning_rate
+        self.nodes = FlatForest(trees)
+        self.leaf_value = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+
+        # The prior init estimator predicts the same raw score for every row
+        probe = np.zeros((1, self.n_features_in_), dtype=np.float32)
+        self.raw_init = booster._raw_predict_init(probe)[0, 0]
+
+    def predict_proba(self, X):
+        X = _as_float32(X)
+        raw = np.full(X.shape[0], self.raw_init, dtype=np.float64)
+
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaves = self.nodes.apply(X[start:start + CHUNK_ROWS])
+            out = raw[start:start + CHUNK_ROWS]
+            # Stage by stage, as predict_stages adds learning_rate * leaf value
+            for t in range(self.n_estimators):
+                out += self.learning_rate * self.leaf_value[leaves[:, t]]
+
+        proba = np.ones((X.shape[0], 2), dtype=np.float64)
+        proba[:, 1] = expit(raw)
+        proba[:, 0] -= proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def to_shared_models(models):
+    """Replace tree ensembles with array-backed equivalents that can be memory-mapped"""
+    shared = {}
+    for name, model in models.items():
+        if isinstance(model, RandomForestClassifier) and model.n_outputs_ == 1:
+            shared[name] = SharedRandomForest(model)
+        elif (isinstance(model, GradientBoostingClassifier)
+              and model.estimators_.shape[1] == 1
+              and (model.init_ == 'zero' or isinstance(model.init_, DummyClassifier))):
+            shared[name] = SharedGradientBoosting(model)
+        else:
+            shared[name] = model
+    return shared
+
+
+def process_memory():
+    """Resident, proportional and shared memory of this process in MB (Linux only)"""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return {}
+
+    def mb(*keys):
+        return round(sum(fields.get(key, 0) for key in keys) / 1024, 2)
+
+    return {
+        'rss_mb': mb('Rss'),
+        'pss_mb': mb('Pss'),
+        'shared_mb': mb('Shared_Clean', 'Shared_Dirty'),
+        'private_mb': mb('Private_Clean', 'Private_Dirty')
+    }
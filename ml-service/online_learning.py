@@ -0,0 +1,250 @@
+"""Mini-batch updates of the live ensemble from labeled feedback.
+
+FeedbackLearner buffers labeled rows in a bounded queue and applies them from a
+background thread, collecting them the way MicroBatcher collects predictions:
+it takes the first waiting row, then keeps collecting until ``batch_size`` rows
+are queued or ``interval_seconds`` have passed since that first row arrived,
+and hands the batch to ``update_fn(X, y)`` in one call. Rows that arrive while
+an update runs wait for the next one.
+
+OnlineLinearModel is the state one update needs: a linear member of the
+ensemble and the scaler statistics it learns with, both advanced by
+partial_fit on each mini-batch.
+"""
+import copy
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+
+def fold_linear(coef, intercept, from_mean, from_scale, to_mean, to_scale):
+    """Weights for rows standardized with (to_mean, to_scale) giving the same decision
+    values as (coef, intercept) on rows standardized with (from_mean, from_scale)"""
+    folded = coef * to_scale / from_scale
+    return folded, float(intercept + np.sum(coef * (to_mean - from_mean) / from_scale))
+
+
+class OnlineLinearModel:
+    """Running state for partial_fit updates of one binary linear ensemble member.
+
+    The member is trained as an SGDClassifier started from its current weights,
+    on rows standardized by a copy of the serving scaler whose mean and variance
+    keep following the feedback. The rest of the ensemble stays on the serving
+    scaler, so model_for() folds the difference into the weights of a copy of
+    the member: the published member takes serving-scaled rows like every other
+    model and gives the online model's decision values. Instances are not
+    modified; updated() returns a new one.
+    """
+
+    def __init__(self, model, scaler, learning_rate=0.01, alpha=1e-4, random_state=42):
+        if len(getattr(model, 'classes_', ())) != 2 or not hasattr(model, 'coef_'):
+            raise ValueError(f'{type(model).__name__} is not a binary linear model')
+        self.template = model
+        self.scaler = copy.deepcopy(scaler)
+        self.sgd = SGDClassifier(loss=getattr(model, 'loss', 'log_loss'), alpha=alpha, learning_rate='constant',
+                                 eta0=learning_rate, random_state=random_state)
+        # partial_fit carries on from weights that are already set
+        self.sgd.coef_ = np.array(model.coef_, dtype=np.float64)
+        self.sgd.intercept_ = np.array(model.intercept_, dtype=np.float64)
+        self.sgd.classes_ = np.array(model.classes_)
+        self.updates = 0
+        self.rows = 0
+
+    def updated(self, X, y):
+        """A new OnlineLinearModel after one partial_fit pass over labeled raw feature rows"""
+        online = copy.copy(self)
+        online.scaler = copy.deepcopy(self.scaler)
+        online.sgd = copy.deepcopy(self.sgd)
+
+        mean, scale = online.scaler.mean_.copy(), online.scaler.scale_.copy()
+        online.scaler.partial_fit(X)
+        # Keep the decision function unchanged across the new statistics before learning from the rows
+        coef, intercept = fold_linear(online.sgd.coef_[0], online.sgd.intercept_[0],
+                                      mean, scale, online.scaler.mean_, online.scaler.scale_)
+        online.sgd.coef_ = coef[np.newaxis]
+        online.sgd.intercept_ = np.array([intercept])
+        online.sgd.partial_fit(online.scaler.transform(X), y, classes=online.sgd.classes_)
+
+        online.updates += 1
+        online.rows += len(X)
+        return online
+
+    def model_for(self, scaler):
+        """A copy of the member with the online weights, for rows scaled by scaler"""
+        coef, intercept = fold_linear(self.sgd.coef_[0], self.sgd.intercept_[0],
+                                      self.scaler.mean_, self.scaler.scale_, scaler.mean_, scaler.scale_)
+        model = copy.copy(self.template)
+        model.coef_ = coef[np.newaxis]
+        model.intercept_ = np.array([intercept])
+        return model
+
+    def stats(self):
+        return {
+            'updates': self.updates,
+            'rows': self.rows,
+            'scaler_samples_seen': int(np.max(self.scaler.n_samples_seen_))
+        }
+
+
+class FeedbackLearner:
+    """Queue labeled rows and apply them to the models in mini-batches.
+
+    ``update_fn(X, y)`` runs on the background thread with a float matrix of
+    raw feature rows and their 0/1 labels; it should publish the updated models
+    itself. A failed update is counted and its rows are dropped.
+    """
+
+    def __init__(self, update_fn, max_queue_size=10000, batch_size=256, interval_seconds=30.0,
+                 latency_window=256):
+        self.update_fn = update_fn
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.batch_size = max(1, int(batch_size))
+        self.interval = max(0.0, float(interval_seconds))
+
+        # Bounded by _pending, which also counts the rows of the batch being collected or applied
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # Stats
+        self._received = 0
+        self._rejected = 0
+        self._applied = 0
+        self._updates = 0
+        self._errors = 0
+        self._last_error = None
+        self._last_update_at = None
+        self._pending = 0
+        self._oldest = None
+        self._update_seconds = deque(maxlen=latency_window)
+        self._lags = deque(maxlen=latency_window * 16)
+
+    def _ensure_started(self):
+        """Start the worker thread, again after a fork since threads do not survive it"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._pending = 0
+                    self._oldest = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='feedback', daemon=True)
+                self._thread.start()
+
+    def submit(self, X, y):
+        """Queue labeled rows, all or none; False when the queue has no room for them"""
+        self._ensure_started()
+        received = time.time()
+        with self._lock:
+            if self._pending + len(X) > self.max_queue_size:
+                self._rejected += len(X)
+                return False
+            for row, label in zip(np.asarray(X, dtype=float), y):
+                self._queue.put_nowait((row, int(label), received))
+            self._pending += len(X)
+            self._received += len(X)
+        return True
+
+    def _collect(self):
+        """Block for the first row, then gather more until the batch is full or the interval expires"""
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.interval
+        with self._lock:
+            self._oldest = batch[0][2]
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            X = np.vstack([item[0] for item in batch])
+            y = np.array([item[1] for item in batch])
+
+            start = time.perf_counter()
+            try:
+                self.update_fn(X, y)
+            except Exception as e:
+                print(f"Feedback update failed, dropping {len(batch)} rows: {str(e)}")
+                with self._lock:
+                    self._pending -= len(batch)
+                    self._oldest = None
+                    self._errors += 1
+                    self._last_error = str(e)
+                continue
+
+            elapsed = time.perf_counter() - start
+            now = time.time()
+            with self._lock:
+                self._pending -= len(batch)
+                self._oldest = None
+                self._applied += len(batch)
+                self._updates += 1
+                self._last_update_at = now
+                self._update_seconds.append(elapsed)
+                self._lags.extend(now - item[2] for item in batch)
+
+    def stats(self):
+        """Queue depth, update latency and how far the live models lag behind the feedback"""
+        now = time.time()
+        with self._lock:
+            # The batch being collected or applied holds the oldest rows, then the queue
+            oldest = self._oldest
+            if oldest is None:
+                with self._queue.mutex:
+                    oldest = self._queue.queue[0][2] if self._queue.queue else None
+
+            update_ms = np.array(self._update_seconds) * 1000.0
+            lags = np.array(self._lags)
+            stats = {
+                'enabled': True,
+                'max_queue_size': self.max_queue_size,
+                'batch_size': self.batch_size,
+                'interval_seconds': self.interval,
+                'queue_depth': self._queue.qsize(),
+                'received': self._received,
+                'rejected': self._rejected,
+                'applied': self._applied,
+                'updates': self._updates,
+                'errors': self._errors,
+                'last_error': self._last_error,
+                'staleness': {
+                    'pending_rows': self._pending,
+                    # Age of the oldest label not yet reflected in the live models
+                    'oldest_pending_seconds': round(now - oldest, 3) if oldest is not None else 0.0,
+                    'seconds_since_update': (round(now - self._last_update_at, 3)
+                                             if self._last_update_at is not None else None)
+                }
+            }
+
+        if len(update_ms):
+            stats['update_latency_ms'] = {
+                'last': round(float(update_ms[-1]), 3),
+                'p50': round(float(np.percentile(update_ms, 50)), 3),
+                'max': round(float(update_ms.max()), 3)
+            }
+        if len(lags):
+            # From a row's arrival to the models that include it going live
+            stats['feedback_lag_seconds'] = {
+                'p50': round(float(np.percentile(lags, 50)), 3),
+                'p99': round(float(np.percentile(lags, 99)), 3),
+                'max': round(float(lags.max()), 3)
+            }
+        return stats
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class PredictionCache:
+    """Bounded LRU cache with a TTL that merges identical concurrent lookups.
+
+    The first caller for a missing key computes the value; callers asking for the
+    same key while it is being computed wait for that result instead of computing
+    it again.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl_seconds)
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        # Stats
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get_or_compute(self, key, compute, cache_if=None):
+        """Return the cached value for key, calling compute() at most once per miss.
+
+        A computed value is stored only if cache_if(value) is true (default: always);
+        callers already waiting on the computation still receive it.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                owner = False
+            else:
+                future = self._in_flight[key] = Future()
+                self._misses += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if self.max_entries and (cache_if is None or cache_if(value)):
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        """Drop every entry, e.g. when a new model set goes live"""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                'enabled': True,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'entries': len(self._entries),
+                'in_flight': len(self._in_flight),
+                'hits': self._hits,
+                'misses': self._misses,
+                'coalesced': self._coalesced,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+                'hit_rate': round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,254 @@
+"""Hyperparameter search for the ensemble by successive halving.
+
+Each model gets up to ``n_candidates`` configurations: its current settings
+plus a random sample of its SEARCH_SPACES grid. Every candidate is trained on
+a small number of rows of each cross-validation fold and scored by ROC AUC on
+the fold's validation rows; the best 1/factor of them go on to ``factor`` times
+as many rows, until the last rung trains the survivors on whole folds. Trials
+of all models run interleaved on one pool of worker processes.
+
+The folds are split, scaled (with a scaler fit on each fold's training rows)
+and shuffled once, then sent to every worker once. A trial with a budget of n
+rows trains on the first n training rows of its fold, so all budgets and
+candidates share the same matrices.
+"""
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+# Grids sampled for each estimator class; other classes keep their settings
+SEARCH_SPACES = {
+    'LogisticRegression': {
+        'C': [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0],
+        'class_weight': [None, 'balanced']
+    },
+    'RandomForestClassifier': {
+        'n_estimators': [100, 200],
+        'max_depth': [None, 4, 8, 16],
+        'min_samples_leaf': [1, 2, 5],
+        'max_features': ['sqrt', 0.5, None]
+    },
+    'GradientBoostingClassifier': {
+        'n_estimators': [50, 100, 200],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_depth': [2, 3, 4],
+        'subsample': [0.7, 1.0],
+        'min_samples_leaf': [1, 5]
+    },
+    'SVC': {
+        'C': [0.1, 0.3, 1.0, 3.0, 10.0, 30.0],
+        'gamma': ['scale', 0.03, 0.1, 0.3, 1.0]
+    },
+    'KernelApproxSVM': {
+        'C': [0.1, 0.3, 1.0, 3.0, 10.0, 30.0],
+        'gamma': [0.03, 0.0625, 0.125, 0.25, 0.5]
+    }
+}
+
+# Scaled fold matrices of this process, set once by init_worker
+_folds = None
+
+
+def init_worker(folds):
+    global _folds
+    _folds = folds
+
+
+def build_folds(X, y, n_folds=3, random_state=42):
+    """(X_train, y_train, X_val, y_val) per stratified fold, scaled with the fold's own scaler.
+
+    Training rows are in random order, so their first n rows are a random sample
+    of the fold.
+    """
+    random = np.random.RandomState(random_state)
+    folds = []
+    for train, val in StratifiedKFold(n_folds, shuffle=True, random_state=random_state).split(X, y):
+        train = random.permutation(train)
+        scaler = StandardScaler().fit(X[train])
+        folds.append((scaler.transform(X[train]), y[train], scaler.transform(X[val]), y[val]))
+    return folds
+
+
+def candidates_for(estimator, n_candidates, random):
+    """Parameter overrides to try: the current settings first, then a sample of the search space"""
+    space = SEARCH_SPACES.get(type(estimator).__name__)
+    if not space or n_candidates < 2:
+        return [{}]
+    grid = ParameterGrid(space)
+    picks = random.choice(len(grid), min(len(grid), n_candidates - 1), replace=False)
+    return [{}] + [grid[int(index)] for index in picks]
+
+
+def halving_schedule(n_candidates, max_rows, factor=3, min_rows=50):
+    """(rows, candidates) per rung; the last rung trains on max_rows"""
+    rungs = 1 + int(math.log(n_candidates) / math.log(factor) + 1e-9) if n_candidates > 1 else 1
+    first = max(min(min_rows, max_rows), max_rows // factor ** (rungs - 1))
+    schedule = []
+    for rung in range(rungs):
+        rows = max_rows if rung == rungs - 1 else min(max_rows, first * factor ** rung)
+        schedule.append((rows, n_candidates))
+        n_candidates = math.ceil(n_candidates / factor)
+    return schedule
+
+
+def run_trial(estimator, params, fold, rows):
+    """ROC AUC and fit+score seconds of one configuration on one fold, trained on its first rows"""
+    X_train, y_train, X_val, y_val = _folds[fold]
+    model = clone(estimator).set_params(**params)
+    if 'n_jobs' in model.get_params():
+        # Trials are already spread over the cores
+        model.set_params(n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(X_train[:rows], y_train[:rows])
+    score = roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+    return score, time.perf_counter() - start
+
+
+def tune_models(estimators, X, y, n_candidates=20, n_folds=3, factor=3, min_rows=50, workers=1,
+                random_state=42, progress=None):
+    """Successive-halving search over every estimator's space on raw feature rows X.
+
+    Returns {'best_params': {name: params}, 'models': {name: search report}, ...}
+    with the total wall time in 'wall_seconds'. ``progress(done, total)`` is
+    called after every trial.
+    """
+    start = time.perf_counter()
+    folds = build_folds(X, y, n_folds, random_state)
+    max_rows = min(len(fold[1]) for fold in folds)
+    random = np.random.RandomState(random_state)
+
+    searches = {}
+    for name, estimator in estimators.items():
+        params = candidates_for(estimator, n_candidates, random)
+        searches[name] = {
+            'params': params,
+            'schedule': halving_schedule(len(params), max_rows, factor, min_rows),
+            'alive': list(range(len(params))),
+            'rung': 0,
+            'scores': {},
+            'rungs': [],
+            'trial_seconds': 0.0
+        }
+    total = sum(count * n_folds for search in searches.values() for _, count in search['schedule'])
+
+    if workers > 1:
+        # spawn for the same reasons as train_models(); each worker gets the folds once
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_worker, initargs=(folds,))
+    else:
+        pool = ThreadPoolExecutor(max_workers=1, initializer=init_worker, initargs=(folds,))
+
+    pending = {}
+
+    def submit_rung(name):
+        search = searches[name]
+        rows = search['schedule'][search['rung']][0]
+        search['scores'] = {candidate: [] for candidate in search['alive']}
+        for candidate in search['alive']:
+            for fold in range(n_folds):
+                future = pool.submit(run_trial, estimators[name], search['params'][candidate], fold, rows)
+                pending[future] = (name, candidate)
+
+    def finish_rung(name):
+        search = searches[name]
+        rows = search['schedule'][search['rung']][0]
+        means = {candidate: float(np.mean(scores)) for candidate, scores in search['scores'].items()}
+        # Best first; ties go to the earlier candidate, so the current settings win a draw
+        ranked = sorted(search['alive'], key=lambda candidate: (-means[candidate], candidate))
+        search['rungs'].append({'rows': rows, 'candidates': len(ranked), 'best_score': round(means[ranked[0]], 4)})
+        search['best'] = ranked[0]
+        search['best_score'] = means[ranked[0]]
+
+        search['rung'] += 1
+        if search['rung'] < len(search['schedule']):
+            search['alive'] = ranked[:search['schedule'][search['rung']][1]]
+            submit_rung(name)
+
+    done = 0
+    with pool:
+        for name in searches:
+            submit_rung(name)
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, candidate = pending.pop(future)
+                search = searches[name]
+                try:
+                    score, seconds = future.result()
+                except Exception as e:
+                    # A configuration that cannot be fit loses the rung
+                    print(f"Tuning {name} with {search['params'][candidate]} failed: {str(e)}")
+                    score, seconds = 0.0, 0.0
+                search['scores'][candidate].append(score)
+                search['trial_seconds'] += seconds
+
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+                if sum(len(scores) for scores in search['scores'].values()) == len(search['alive']) * n_folds:
+                    finish_rung(name)
+
+    report = {}
+    for name, search in searches.items():
+        report[name] = {
+            'best_params': search['params'][search['best']],
+            'cv_roc_auc': round(search['best_score'], 4),
+            'candidates': len(search['params']),
+            'rungs': search['rungs'],
+            'trial_seconds': round(search['trial_seconds'], 3)
+        }
+
+    return {
+        'best_params': {name: search['params'][search['best']] for name, search in searches.items()},
+        'models': report,
+        'scoring': 'roc_auc',
+        'folds': n_folds,
+        'factor': factor,
+        'workers': workers,
+        'trials': total,
+        'wall_seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def save_best_params(path, tuning, models):
+    """Write each model's winning configuration, and the class it applies to, as JSON"""
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'tuned_at': time.time(),
+            'wall_seconds': tuning['wall_seconds'],
+            'scoring': tuning['scoring'],
+            'models': {
+                name: {
+                    'estimator': type(models[name]).__name__,
+                    'params': tuning['best_params'][name],
+                    'cv_roc_auc': tuning['models'][name]['cv_roc_auc']
+                }
+                for name in tuning['best_params']
+            }
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_best_params(path, estimators):
+    """Saved configurations for the estimators of the same class; {} without a saved search"""
+    try:
+        with open(path) as f:
+            saved = json.load(f)['models']
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {
+        name: entry['params']
+        for name, entry in saved.items()
+        if name in estimators and entry.get('estimator') == type(estimators[name]).__name__
+    }
@@ -0,0 +1,101 @@
+"""Request bodies and response encodings accepted by the prediction routes.
+
+Bodies can be JSON, MessagePack (when the optional ``msgpack`` package is
+installed) or a raw little-endian float matrix, chosen by Content-Type:
+
+    application/json                          records, or {"columns": {feature: [...]}}
+    application/msgpack                       the same structures, MessagePack-encoded
+    application/octet-stream; dtype=float32   rows x features, float32 or float64 (default)
+
+Responses are JSON unless the Accept header prefers application/msgpack.
+"""
+import numpy as np
+from flask import Response, jsonify
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for MessagePack bodies and responses
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+MATRIX_TYPE = 'application/octet-stream'
+MATRIX_DTYPES = {'float32': np.dtype('<f4'), 'float64': np.dtype('<f8')}
+
+
+class PayloadError(ValueError):
+    """A request body that cannot be decoded; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_body(request, n_features):
+    """The request body as a parsed JSON/MessagePack object or a (rows, n_features) float64 matrix"""
+    mimetype = request.mimetype
+
+    if mimetype == MATRIX_TYPE:
+        dtype_name = request.mimetype_params.get('dtype', 'float64')
+        dtype = MATRIX_DTYPES.get(dtype_name)
+        if dtype is None:
+            raise PayloadError(f'Unsupported matrix dtype: {dtype_name} (use float32 or float64)')
+        raw = request.get_data()
+        if len(raw) % (dtype.itemsize * n_features):
+            raise PayloadError(f'Matrix body must hold rows of {n_features} {dtype_name} values')
+        return check_finite(np.frombuffer(raw, dtype=dtype).reshape(-1, n_features).astype(np.float64))
+
+    if mimetype in MSGPACK_TYPES:
+        if msgpack is None:
+            raise PayloadError('MessagePack support is not installed (pip install msgpack)', 415)
+        try:
+            return msgpack.unpackb(request.get_data(), raw=False)
+        except Exception as e:
+            raise PayloadError(f'Invalid MessagePack body: {e}')
+
+    if mimetype != JSON_TYPE:
+        raise PayloadError(f'Unsupported content type: {mimetype or "none"}', 415)
+    return request.get_json()
+
+
+def columns_to_matrix(columns, features):
+    """A {feature: [values]} mapping as a (rows, features) float64 matrix"""
+    if not isinstance(columns, dict):
+        raise PayloadError('columns must map feature names to lists of values')
+    missing = [feature for feature in features if feature not in columns]
+    if missing:
+        raise PayloadError(f'Missing required feature: {missing[0]}')
+    arrays = []
+    for feature in features:
+        try:
+            values = np.asarray(columns[feature], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise PayloadError(f'Invalid values for feature: {feature}')
+        if values.ndim != 1:
+            raise PayloadError(f'{feature} must be a flat list of numbers')
+        arrays.append(values)
+    if len({len(values) for values in arrays}) > 1:
+        raise PayloadError('All columns must have the same length')
+    return check_finite(np.column_stack(arrays))
+
+
+def check_finite(matrix):
+    if not np.isfinite(matrix).all():
+        row = int(np.argmin(np.isfinite(matrix).all(axis=1)))
+        raise PayloadError(f'Record {row}: non-finite feature value')
+    return matrix
+
+
+def wants_msgpack(request):
+    """Whether the Accept header prefers MessagePack and it can be produced"""
+    if msgpack is None:
+        return False
+    best = request.accept_mimetypes.best_match([JSON_TYPE, *MSGPACK_TYPES])
+    return best in MSGPACK_TYPES
+
+
+def encode_response(request, body):
+    """body as MessagePack when the client asked for it, JSON otherwise"""
+    if wants_msgpack(request):
+        return Response(msgpack.packb(body, use_bin_type=True), mimetype=MSGPACK_TYPES[0])
+    return jsonify(body)
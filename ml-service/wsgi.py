@@ -0,0 +1,28 @@
+"""WSGI entry point for the diabetes ML service.
+
+    gunicorn -c gunicorn.conf.py
+
+With ``preload_app`` the gunicorn master imports this module once: it loads
+the models (training them first if ``models/`` is empty and TRAIN_IF_MISSING
+allows it), runs warmup inferences through every model, and only then forks
+the workers, which share the loaded pages copy-on-write. Workers therefore
+start out ready and ``/health`` never routes traffic to a cold worker.
+"""
+import gc
+import os
+import sys
+
+import app as service
+
+app = service.app
+
+if os.environ.get('TRAIN_IF_MISSING', '1') != '1' and not os.path.exists('models/diabetes_models.pkl'):
+    print("No trained models in models/ and TRAIN_IF_MISSING=0, refusing to start")
+    sys.exit(1)
+
+service.load_models()
+service.mark_ready(service.warmup_models())
+
+# Move everything loaded so far out of the collector's generations so that
+# garbage collection in the workers does not touch (and copy) the shared pages
+gc.freeze()
@@ -0,0 +1,74 @@
+# Regression check for the diabetes ensemble's /predict/batch route
+# Run with: python -m pytest test_batch_prediction.py
+#
+# Every record of one /predict/batch call must get exactly the result that a
+# single /predict call gives for it. Models are trained in a temporary directory.
+
+import json
+import os
+
+import pytest
+
+BAD_VALUES = ['abc', None, float('nan'), float('inf')]
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """The ML service, with freshly trained models and no prediction cache"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('models'))
+    os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    os.environ.setdefault('TRAIN_WORKERS', '1')
+    import app
+
+    app.load_models()
+    app.mark_ready(app.warmup_models())
+    yield app
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='module')
+def records(app):
+    sample = app.create_sample_data(200, seed=7)[app.FEATURES]
+    return [{feature: float(value) for feature, value in zip(app.FEATURES, row)} for row in sample.to_numpy()]
+
+
+def test_batch_matches_single_predictions(app, records):
+    client = app.app.test_client()
+    response = client.post('/predict/batch', json={'records': records})
+    assert response.status_code == 200, response.get_json()
+    batch = response.get_json()['results']
+
+    mismatches = [index for index, record in enumerate(records)
+                  if client.post('/predict', json=record).get_json() != batch[index]]
+
+    assert not mismatches, f'{len(mismatches)} of {len(records)} records differ, first {records[mismatches[0]]}'
+
+
+@pytest.mark.parametrize('value', BAD_VALUES)
+def test_bad_values_are_rejected_on_every_path(app, records, value):
+    """Bad values are the caller's error, not the service's, whichever way they are sent"""
+    client = app.app.test_client()
+    record = dict(records[0], Glucose=value)
+    for path, body in (('/predict', record), ('/predict/batch', {'records': [record]}),
+                       ('/predict/batch', {'columns': {key: [record[key]] for key in record}})):
+        response = client.post(path, data=json.dumps(body), content_type='application/json')
+        assert response.status_code == 400, (path, response.get_json())
+
+
+def test_stage_timings_are_labelled_by_route(app, records):
+    """Batch rows and warmup must not land in the histograms of live /predict traffic"""
+    def scale_count(route):
+        for line in app.registry.render().splitlines():
+            if line.startswith(f'ml_service_predict_stage_seconds_count{{route="{route}",stage="scale"}}'):
+                return int(line.split()[-1])
+        return 0
+
+    client = app.app.test_client()
+    before = scale_count('/predict'), scale_count('/predict/batch')
+    app.warmup_models()
+    client.post('/predict/batch', json={'records': records})
+    assert (scale_count('/predict'), scale_count('/predict/batch')) == (before[0], before[1] + 1)
+
+    client.post('/predict', json=records[1])
+    assert scale_count('/predict') == before[0] + 1
@@ -0,0 +1,70 @@
+# Regression check for merging mental health CohortSummary shards
+# Run with: python -m pytest test_cohort_summary.py
+#
+# Summaries built from shards of a cohort and merged, directly or after a
+# to_dict/from_dict round trip through JSON, must report exactly what one
+# summary over the whole cohort reports. Both copies of mental_health_model.py
+# are checked.
+
+import json
+
+import numpy as np
+
+ASSESSMENTS = 50000
+# Questionnaire lengths and item maxima, in the column order of predict_mental_health_batch
+ITEMS = [(9, 3), (7, 3), (10, 4), (5, 5)]
+
+
+def sample_responses(rng, n):
+    """Random answers, with a last stretch of rows above the item maxima so histogram lengths differ by shard"""
+    responses = np.hstack([rng.randint(0, high + 1, (n, count)) for count, high in ITEMS])
+    responses[-100:] += rng.randint(0, 3, (100, responses.shape[1]))
+    return responses
+
+
+def shard_summaries(module, responses, rng):
+    """Summaries of uneven shards, an empty one, and one fed as input dicts rather than a matrix"""
+    bounds = sorted(rng.choice(np.arange(1, len(responses)), 6, replace=False).tolist())
+    shards = np.split(responses, bounds) + [responses[:0]]
+    summaries = [module.CohortSummary().update(shard) for shard in shards[1:]]
+    records = [{'phq9_answers': row[:9], 'gad7_answers': row[9:16], 'pss_answers': row[16:26], 'who5_answers': row[26:]}
+               for row in shards[0].tolist()]
+    summaries.insert(0, module.CohortSummary().update(records))
+    return summaries
+
+
+def test_merged_shards_match_single_pass(model_copy):
+    module = model_copy('mental_health_model')
+    rng = np.random.RandomState(42)
+    responses = sample_responses(rng, ASSESSMENTS)
+    single = module.CohortSummary().update(responses).report()
+
+    merged = module.CohortSummary()
+    for summary in shard_summaries(module, responses, rng):
+        merged.merge(summary)
+
+    assert merged.report() == single
+
+
+def test_shipped_shards_match_single_pass(model_copy):
+    module = model_copy('mental_health_model')
+    rng = np.random.RandomState(42)
+    responses = sample_responses(rng, ASSESSMENTS)
+    single = module.CohortSummary().update(responses).report()
+
+    shipped = module.CohortSummary()
+    for summary in reversed(shard_summaries(module, responses, rng)):
+        shipped.merge(module.CohortSummary.from_dict(json.loads(json.dumps(summary.to_dict()))))
+
+    assert shipped.report() == single
+
+
+def test_report_matches_numpy(model_copy):
+    module = model_copy('mental_health_model')
+    responses = sample_responses(np.random.RandomState(42), ASSESSMENTS)
+    report = module.CohortSummary().update(responses).report()
+
+    totals = module.MentalHealthPredictor().predict_mental_health_batch(responses)['scores']
+    for name, values in totals.items():
+        assert report['scores'][name]['mean'] == int(values.sum()) / len(values)
+        assert report['scores'][name]['percentiles']['p50'] == int(np.percentile(values, 50, method='inverted_cdf'))
@@ -0,0 +1,54 @@
+# Regression check for DiabetesPredictor.predict_diabetes_batch
+# Run with: python -m pytest test_diabetes_batch.py
+#
+# The batch method must give bit-for-bit the numbers, bands and recommendations
+# of calling predict_diabetes once per row, in both copies of diabetes_model.py.
+
+import numpy as np
+
+ROWS = 20000
+
+
+def sample_rows(rng, n):
+    """Random rows spanning and overshooting every clipped range, plus exact band edges"""
+    rows = np.column_stack([
+        rng.randint(0, 15, n),
+        rng.uniform(40, 240, n),
+        rng.uniform(30, 140, n),
+        rng.uniform(0, 60, n),
+        rng.uniform(0, 400, n),
+        rng.uniform(15, 50, n),
+        rng.uniform(0, 2.5, n),
+        rng.randint(18, 90, n)
+    ]).astype(np.float64)
+    rows[:8] = [[0, 100, 60, 7, 15, 25, 1, 45], [10, 140, 120, 50, 300, 30, 0.5, 20],
+                [3, 70, 80, 20, 80, 18.5, 0, 80], [1, 200, 90, 35, 120, 40, 1.5, 46],
+                [0, 0, 0, 0, 0, 0, 0, 0], [5, 101, 61, 8, 16, 25.1, 0.99, 44],
+                [12, 141, 119, 49, 299, 30.1, 2.4, 81], [2, 99.9, 59.9, 6.9, 14.9, 24.9, 0.01, 19]]
+    return rows
+
+
+def same(a, b):
+    return repr(float(a)) == repr(float(b))
+
+
+def test_batch_matches_single_rows(model_copy):
+    predictor = model_copy('diabetes_model').DiabetesPredictor()
+    rows = sample_rows(np.random.RandomState(42), ROWS)
+    batch = predictor.predict_diabetes_batch(rows, recommendations=True)
+
+    mismatches = []
+    for index, row in enumerate(rows.tolist()):
+        single = predictor.predict_diabetes(dict(zip(predictor.FEATURES, row)))
+        equal = (
+            single['prediction'] == batch['prediction'][index]
+            and same(single['probability'], batch['probability'][index])
+            and same(single['confidence'], batch['confidence'][index])
+            and single['risk'] == batch['risk'][index]
+            and single['recommendations'] == batch['recommendations'][index]
+            and all(same(value, batch['risk_factors'][name][index]) for name, value in single['risk_factors'].items())
+        )
+        if not equal:
+            mismatches.append(index)
+
+    assert not mismatches, f'{len(mismatches)} of {ROWS} rows differ, first {rows[mismatches[0]].tolist()}'
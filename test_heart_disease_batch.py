@@ -0,0 +1,77 @@
+# Regression check for HeartDiseasePredictor.predict_heart_disease_batch
+# Run with: python -m pytest test_heart_disease_batch.py
+#
+# The batch method must give bit-for-bit the numbers, bands, recommendations and
+# risk factors (in the same order) of calling predict_heart_disease once per row,
+# in both copies of heart_disease_model.py.
+
+import numpy as np
+
+ROWS = 20000
+CATEGORICAL = ['sex', 'chestPainType', 'fastingBS', 'restingECG', 'exerciseAngina', 'stSlope']
+
+
+def sample_rows(rng, n):
+    """Random rows spanning and overshooting every clipped range and code, plus exact band edges"""
+    rows = np.column_stack([
+        rng.randint(20, 90, n),
+        rng.randint(0, 2, n),
+        rng.randint(0, 4, n),
+        rng.uniform(80, 210, n),
+        rng.uniform(100, 600, n),
+        rng.randint(0, 2, n),
+        rng.randint(0, 3, n),
+        rng.uniform(60, 210, n),
+        rng.randint(0, 2, n),
+        rng.uniform(0, 7, n),
+        rng.randint(-1, 4, n)
+    ]).astype(np.float64)
+    rows[:8] = [[29, 0, 0, 90, 126, 0, 0, 191, 0, 0, 0], [77, 1, 3, 200, 564, 1, 2, 60, 1, 6.2, 2],
+                [45, 1, 1, 120, 200, 0, 1, 140, 0, 1, 1], [46, 0, 2, 121, 201, 1, 0, 139.2, 1, 1.1, 3],
+                [55, 1, 3, 140, 240, 0, 2, 132, 0, 2, -1], [56, 0, 0, 141, 241, 1, 1, 131.2, 1, 2.1, 0],
+                [60, 1, 2, 130, 220, 0, 0, 120, 1, 8, 1], [28, 0, 1, 85, 100, 1, 2, 200, 0, 0.5, 2]]
+    return rows
+
+
+def row_input(features, row):
+    """A row as the input dict a caller would send, with integer codes"""
+    values = dict(zip(features, row))
+    for name in CATEGORICAL:
+        values[name] = int(values[name])
+    return values
+
+
+def same(a, b):
+    return repr(float(a)) == repr(float(b))
+
+
+def test_batch_matches_single_rows(model_copy):
+    predictor = model_copy('heart_disease_model').HeartDiseasePredictor()
+    rows = sample_rows(np.random.RandomState(42), ROWS)
+    batch = predictor.predict_heart_disease_batch(rows, recommendations=True)
+
+    mismatches = []
+    for index, row in enumerate(rows.tolist()):
+        single = predictor.predict_heart_disease(row_input(predictor.FEATURES, row))
+        equal = (
+            single['prediction'] == batch['prediction'][index]
+            and same(single['probability'], batch['probability'][index])
+            and same(single['confidence'], batch['confidence'][index])
+            and single['risk'] == batch['risk'][index]
+            and single['recommendations'] == batch['recommendations'][index]
+            and single['model_info'] == batch['model_info']
+            and all(same(value, batch['risk_factors'][name][index]) for name, value in single['risk_factors'].items())
+        )
+        if not equal:
+            mismatches.append(index)
+
+    assert not mismatches, f'{len(mismatches)} of {ROWS} rows differ, first {rows[mismatches[0]].tolist()}'
+
+
+def test_risk_factor_order_matches(model_copy):
+    predictor = model_copy('heart_disease_model').HeartDiseasePredictor()
+    rows = sample_rows(np.random.RandomState(42), 8)
+    single = predictor.predict_heart_disease(row_input(predictor.FEATURES, rows[0].tolist()))
+    batch = predictor.predict_heart_disease_batch(rows)
+
+    assert list(batch['risk_factors']) == list(single['risk_factors'])
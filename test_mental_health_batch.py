@@ -0,0 +1,95 @@
+# Regression check for MentalHealthPredictor.predict_mental_health_batch
+# Run with: python -m pytest test_mental_health_batch.py
+#
+# The batch method must give exactly what predict_mental_health gives for each
+# row. It scores from the SEVERITY_BANDS, OVERALL_BANDS and RECOMMENDATION_CUTOFFS
+# tables rather than the scalar methods' if-ladders, so the tables are also
+# checked against those methods for every total, to fail as soon as the two drift
+# apart. Both copies of mental_health_model.py are checked.
+
+import bisect
+import itertools
+
+import numpy as np
+
+ASSESSMENTS = 20000
+# Questionnaire lengths and item maxima, in the column order of predict_mental_health_batch
+ITEMS = [(9, 3), (7, 3), (10, 4), (5, 5)]
+LEVEL_METHODS = {'depression': '_get_depression_level', 'anxiety': '_get_anxiety_level',
+                 'stress': '_get_stress_level', 'wellbeing': '_get_wellbeing_level'}
+
+
+def sample_responses(rng, n):
+    """Random answers, with the occasional one above an item's maximum"""
+    responses = np.hstack([rng.randint(0, high + 1, (n, count)) for count, high in ITEMS])
+    overshoot = rng.random_sample(responses.shape) < 0.02
+    return responses + overshoot * rng.randint(1, 3, responses.shape)
+
+
+def batch_row(batch, index):
+    """Row index of a batch result in the layout of predict_mental_health"""
+    return {
+        'scores': {name: int(values[index]) for name, values in batch['scores'].items()},
+        'severity_levels': {name: str(values[index]) for name, values in batch['severity_levels'].items()},
+        'overall_status': str(batch['overall_status'][index]),
+        'recommendations': batch['recommendations'][index],
+        'risk_factors': {group: {name: int(values[index]) for name, values in subscales.items()}
+                         for group, subscales in batch['risk_factors'].items()},
+        'model_info': batch['model_info']
+    }
+
+
+def test_batch_matches_single_rows(model_copy):
+    predictor = model_copy('mental_health_model').MentalHealthPredictor()
+    responses = sample_responses(np.random.RandomState(42), ASSESSMENTS)
+    batch = predictor.predict_mental_health_batch(responses, recommendations=True)
+
+    mismatches = []
+    for index, row in enumerate(responses.tolist()):
+        single = predictor.predict_mental_health({
+            'phq9_answers': row[:9], 'gad7_answers': row[9:16], 'pss_answers': row[16:26], 'who5_answers': row[26:]
+        })
+        if single != batch_row(batch, index):
+            mismatches.append(index)
+
+    assert not mismatches, f'{len(mismatches)} of {ASSESSMENTS} rows differ, first {responses[mismatches[0]].tolist()}'
+
+
+def test_severity_bands_match_level_methods(model_copy):
+    predictor = model_copy('mental_health_model').MentalHealthPredictor()
+    sizes = dict(zip(LEVEL_METHODS, predictor.TOTAL_SIZES))
+
+    for name, (_, cutoffs, labels, points) in predictor.SEVERITY_BANDS.items():
+        level = getattr(predictor, LEVEL_METHODS[name])
+        for total in range(sizes[name] + 10):
+            assert labels[bisect.bisect_right(cutoffs, total)] == level(total), (name, total)
+        for label, point in zip(labels, points):
+            assert predictor.SEVERITY_POINTS[label] == point, (name, label)
+
+
+def test_overall_bands_match_overall_status(model_copy):
+    predictor = model_copy('mental_health_model').MentalHealthPredictor()
+    cutoffs, statuses = predictor.OVERALL_BANDS
+    bands = [list(zip(labels, points)) for _, _, labels, points in predictor.SEVERITY_BANDS.values()]
+
+    for combination in itertools.product(*bands):
+        labels, points = zip(*combination)
+        assert statuses[bisect.bisect_right(cutoffs, sum(points))] == predictor._calculate_overall_status(*labels), labels
+
+
+def test_recommendation_cutoffs_match_recommendations(model_copy):
+    predictor = model_copy('mental_health_model').MentalHealthPredictor()
+    # Totals that add no questionnaire-specific recommendation
+    quiet = [0, 0, 0, predictor.TOTAL_SIZES[3] - 1]
+
+    for axis, (size, cutoffs) in enumerate(zip(predictor.TOTAL_SIZES, predictor.RECOMMENDATION_CUTOFFS)):
+        previous = None
+        changes = []
+        for total in range(size + 10):
+            totals = list(quiet)
+            totals[axis] = total
+            recommendations = predictor._generate_recommendations(*totals, *[None] * 4)
+            if previous is not None and recommendations != previous:
+                changes.append(total)
+            previous = recommendations
+        assert changes == list(cutoffs), (axis, changes)
@@ -0,0 +1,71 @@
+# Regression check for the mental health OutcomeTable
+# Run with: python -m pytest test_mental_health_outcome_table.py
+#
+# For all 28 x 22 x 41 x 26 combinations of the four totals, the table must give
+# the severity levels, overall status and recommendations that the predictor's
+# own scoring methods give, and a save/load round trip must not change it.
+# Whole assessments, including answers out of range, must come out the same
+# with and without the table. Both copies of mental_health_model.py are checked.
+
+import itertools
+import random
+
+ASSESSMENTS = 20000
+
+
+def scalar_outcome(predictor, totals):
+    levels = (predictor._get_depression_level(totals[0]), predictor._get_anxiety_level(totals[1]),
+              predictor._get_stress_level(totals[2]), predictor._get_wellbeing_level(totals[3]))
+    return levels + (predictor._calculate_overall_status(*levels),
+                     predictor._generate_recommendations(*totals, *levels))
+
+
+def random_assessment(rng):
+    """Answers in range, with the occasional one above a questionnaire's maximum"""
+    def answers(count, high):
+        return [rng.randint(0, high + 2) if rng.random() < 0.02 else rng.randint(0, high) for _ in range(count)]
+    return {
+        'phq9_answers': answers(9, 3),
+        'gad7_answers': answers(7, 3),
+        'pss_answers': answers(10, 4),
+        'who5_answers': answers(5, 5)
+    }
+
+
+def test_table_matches_scalar_scoring(model_copy):
+    module = model_copy('mental_health_model')
+    predictor = module.MentalHealthPredictor()
+    table = module.OutcomeTable.build()
+
+    sizes = module.MentalHealthPredictor.TOTAL_SIZES
+    mismatches = [totals for totals in itertools.product(*(range(size) for size in sizes))
+                  if table.lookup(*totals) != scalar_outcome(predictor, totals)]
+
+    assert len(table.cells) == 28 * 22 * 41 * 26
+    assert not mismatches, f'{len(mismatches)} combinations differ, first {mismatches[0]}'
+
+
+def test_save_load_round_trip(model_copy, tmp_path):
+    module = model_copy('mental_health_model')
+    table = module.OutcomeTable.build()
+    table.save(tmp_path / 'outcomes.bin')
+    loaded = module.OutcomeTable.load(tmp_path / 'outcomes.bin')
+
+    assert loaded.cells == table.cells
+    assert loaded.outcomes == table.outcomes
+    assert loaded.recommendation_sets == table.recommendation_sets
+
+
+def test_assessments_match_with_and_without_table(model_copy):
+    module = model_copy('mental_health_model')
+    plain = module.MentalHealthPredictor()
+    tabled = module.MentalHealthPredictor(module.OutcomeTable.build())
+
+    rng = random.Random(42)
+    mismatches = []
+    for _ in range(ASSESSMENTS):
+        assessment = random_assessment(rng)
+        if plain.predict_mental_health(assessment) != tabled.predict_mental_health(assessment):
+            mismatches.append(assessment)
+
+    assert not mismatches, f'{len(mismatches)} of {ASSESSMENTS} assessments differ, first {mismatches[0]}'